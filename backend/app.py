@@ -1,9 +1,7 @@
 import os
 import logging
-import sqlite3
-import json
-import datetime
 from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import routers
@@ -20,8 +18,16 @@ from backend.routes import (
 )
 
 # Import configuration
-from backend.core.config import LOG_DIR, DB_PATH, LOG_FILE
+from backend.core.config import LOG_DIR, DB_PATH, LOG_FILE, WARMUP_MODELS
 from backend.core.logger import logger
+from backend.core.llm_gate import gate as llm_gate
+from backend.core.url_fetcher import close_client as close_url_client
+from backend.core.audio_transcriber import preload_whisper_models, start_live_session_sweeper
+from backend.core.executors import pool_stats, shutdown_pools
+from backend.core.embedding_manager import start_warmup, start_checkpointer, stop_checkpointer
+from backend.core.encoder_pool import shutdown_encoder_pool
+from backend.core import readiness, analytics
+from backend.core.metrics import render as render_metrics
 
 # --------------------------------------------------------------------
 # Directory setup
@@ -32,34 +38,7 @@ os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 # --------------------------------------------------------------------
 # SQLite database initialization (for analytics & sessions)
 # --------------------------------------------------------------------
-conn = sqlite3.connect(DB_PATH)
-c = conn.cursor()
-
-# Analytics table
-c.execute("""
-CREATE TABLE IF NOT EXISTS analytics (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    session_id TEXT,
-    user_id TEXT,
-    message TEXT,
-    response TEXT,
-    latency REAL,
-    tokens INTEGER,
-    created_at TEXT
-)
-""")
-
-# Sessions table
-c.execute("""
-CREATE TABLE IF NOT EXISTS sessions (
-    id TEXT PRIMARY KEY,
-    user_id TEXT,
-    created_at TEXT
-)
-""")
-
-conn.commit()
-conn.close()
+analytics.init_db()
 
 # --------------------------------------------------------------------
 # Logging configuration
@@ -103,6 +82,26 @@ app.include_router(chat_stream.router, prefix="/api")
 app.include_router(retriever_routes.router, prefix="/api")
 app.include_router(inference_routes.router, prefix="/api")
 
+READY_REQUIRES = ("index", "text_embedder")
+
+@app.on_event("startup")
+def startup():
+    # models load lazily; warm-up only moves the first load off the request path
+    if WARMUP_MODELS:
+        start_warmup()
+    preload_whisper_models()
+    start_live_session_sweeper()
+    start_checkpointer()
+    analytics.writer.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_url_client()
+    shutdown_pools()
+    shutdown_encoder_pool()
+    stop_checkpointer()
+    analytics.close()
+
 # --------------------------------------------------------------------
 # Health check endpoint
 # --------------------------------------------------------------------
@@ -111,71 +110,63 @@ def health():
     """Simple health check endpoint."""
     return {"status": "ok", "message": "Backend active and healthy"}
 
+@app.get("/api/ready")
+def ready():
+    """Readiness: 200 once the index and text embedder are loaded, 503 before."""
+    ok = readiness.is_ready(READY_REQUIRES)
+    body = {"ready": ok, "models": readiness.states()}
+    return body if ok else JSONResponse(status_code=503, content=body)
+
+@app.get("/api/metrics")
+def metrics():
+    """Prometheus metrics: per-stage latency histograms, LLM timings, cache/index/queue gauges."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/api/llm/queue")
+def llm_queue():
+    """LLM admission control state: active slots, queue depth and wait times."""
+    return llm_gate.stats()
+
+@app.get("/api/executors")
+def executors():
+    """Per-workload executor pools: queue depth, run and wait times."""
+    return pool_stats()
+
 # --------------------------------------------------------------------
 # Analytics endpoints
 # --------------------------------------------------------------------
 @app.post("/api/analytics/log")
 def log_entry(payload: dict):
-    """Log user interaction and model response."""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute("""
-            INSERT INTO analytics (session_id, user_id, message, response, latency, tokens, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            payload.get("session_id"),
-            payload.get("user_id"),
-            payload.get("message"),
-            payload.get("response"),
-            payload.get("latency"),
-            payload.get("tokens"),
-            datetime.datetime.utcnow().isoformat()
-        ))
-        conn.commit()
-        conn.close()
-        return {"ok": True}
-    except Exception as e:
-        logger.exception("Analytics log error")
-        return Response(
-            content=json.dumps({"ok": False, "error": str(e)}),
-            media_type="application/json",
-            status_code=500,
-        )
+    """Queue a user interaction and model response; written in batches in the background."""
+    if not analytics.writer.record(payload):
+        return JSONResponse(status_code=503, content={"ok": False, "error": "Analytics queue is full."})
+    return {"ok": True}
 
 @app.get("/api/analytics/stats")
 def stats():
-    """Return aggregated analytics stats."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*), AVG(latency) FROM analytics")
-    row = c.fetchone()
-    conn.close()
-    total = row[0] or 0
-    avg_latency = float(row[1]) if row[1] else 0.0
-    return {"requests": total, "avg_latency": avg_latency}
+    """Return aggregated analytics stats (from running totals)."""
+    return analytics.totals()
 
 @app.get("/api/analytics/timeline")
 def timeline(limit: int = 50):
     """Return recent analytics timeline."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        SELECT created_at, user_id, message, latency, tokens
-        FROM analytics
-        ORDER BY created_at DESC
-        LIMIT ?
-    """, (limit,))
-    rows = c.fetchall()
-    conn.close()
-    timeline = [
-        {
-            "timestamp": r[0],
-            "user_id": r[1],
-            "message": r[2],
-            "latency": r[3],
-            "tokens": r[4],
-        }
-        for r in rows
-    ]
-    return {"timeline": timeline}
+    return {"timeline": analytics.timeline(limit)}
+
+@app.get("/api/analytics/models")
+def models():
+    """Per-model throughput recorded server-side: requests, latency, TTFT, tokens/sec."""
+    return {"models": analytics.model_throughput()}
+
+@app.get("/api/analytics/generations")
+def generations(model: str = None, limit: int = 50):
+    """Most recent recorded generations with their request id, route, timings and token counts."""
+    return {"generations": analytics.recent_generations(model, limit)}
+
+@app.get("/api/analytics/rollups")
+def rollups(granularity: str = "minute", limit: int = 60):
+    """Per-minute or per-hour request counts, average latency and tokens, newest first."""
+    try:
+        return {"granularity": granularity, "buckets": analytics.rollups(granularity, limit)}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
@@ -0,0 +1,377 @@
+"""
+Analytics storage (sqlite).
+Writes are queued and batch-committed by one background writer thread on a
+persistent WAL-mode connection, so request handlers never wait on sqlite.
+Each batch also updates running totals and per-minute / per-hour rollups in
+the same transaction, so stats and timeline queries stay O(1) / O(limit)
+regardless of table size.
+"""
+import datetime
+import queue
+import sqlite3
+import time
+from threading import Thread, Lock
+from .config import DB_PATH, ANALYTICS_BATCH_SIZE, ANALYTICS_FLUSH_MS, ANALYTICS_QUEUE_MAX, ANALYTICS_MINUTE_RETENTION_DAYS
+from .logger import logger
+
+# columns added after the original schema; init_db adds any that are missing
+MIGRATED_COLUMNS = {
+    "request_id": "TEXT",
+    "route": "TEXT",
+    "model": "TEXT",
+    "ttft": "REAL",
+    "prompt_tokens": "INTEGER",
+    "eval_seconds": "REAL",
+    "tokens_per_s": "REAL",
+}
+
+# columns callers may set on an analytics row (created_at is filled in on enqueue)
+ANALYTICS_COLUMNS = ("session_id", "user_id", "message", "response", "latency", "tokens") + tuple(MIGRATED_COLUMNS)
+
+GRANULARITIES = {"minute": 16, "hour": 13}  # prefix length of the ISO timestamp
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def init_db():
+    """Create tables, indexes and rollups; backfills rollups once for pre-existing rows."""
+    conn = _connect()
+    c = conn.cursor()
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS analytics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT,
+        user_id TEXT,
+        message TEXT,
+        response TEXT,
+        latency REAL,
+        tokens INTEGER,
+        created_at TEXT
+    )
+    """)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        user_id TEXT,
+        created_at TEXT
+    )
+    """)
+    _migrate(c)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_analytics_created_at ON analytics (created_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_analytics_model ON analytics (model, created_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_analytics_session ON analytics (session_id, created_at)")
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS analytics_rollup (
+        granularity TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        requests INTEGER NOT NULL DEFAULT 0,
+        latency_sum REAL NOT NULL DEFAULT 0,
+        latency_count INTEGER NOT NULL DEFAULT 0,
+        tokens_sum INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularity, bucket)
+    )
+    """)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS analytics_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        requests INTEGER NOT NULL DEFAULT 0,
+        latency_sum REAL NOT NULL DEFAULT 0,
+        latency_count INTEGER NOT NULL DEFAULT 0,
+        tokens_sum INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS analytics_model_totals (
+        model TEXT PRIMARY KEY,
+        requests INTEGER NOT NULL DEFAULT 0,
+        latency_sum REAL NOT NULL DEFAULT 0,
+        ttft_sum REAL NOT NULL DEFAULT 0,
+        ttft_count INTEGER NOT NULL DEFAULT 0,
+        prompt_tokens_sum INTEGER NOT NULL DEFAULT 0,
+        eval_tokens_sum INTEGER NOT NULL DEFAULT 0,
+        eval_seconds_sum REAL NOT NULL DEFAULT 0
+    )
+    """)
+    if c.execute("SELECT 1 FROM analytics_totals WHERE id = 1").fetchone() is None:
+        _backfill(c)
+    if c.execute("SELECT 1 FROM analytics_model_totals LIMIT 1").fetchone() is None:
+        _backfill_models(c)
+    conn.commit()
+    conn.close()
+
+
+def _migrate(c):
+    existing = {row[1] for row in c.execute("PRAGMA table_info(analytics)")}
+    for name, kind in MIGRATED_COLUMNS.items():
+        if name not in existing:
+            c.execute(f"ALTER TABLE analytics ADD COLUMN {name} {kind}")
+            logger.info("Added analytics column %s", name)
+
+
+def _backfill(c):
+    c.execute("""
+        INSERT INTO analytics_totals (id, requests, latency_sum, latency_count, tokens_sum)
+        SELECT 1, COUNT(*), COALESCE(SUM(latency), 0), COUNT(latency), COALESCE(SUM(tokens), 0) FROM analytics
+    """)
+    for name, width in GRANULARITIES.items():
+        c.execute(f"""
+            INSERT OR REPLACE INTO analytics_rollup (granularity, bucket, requests, latency_sum, latency_count, tokens_sum)
+            SELECT ?, substr(created_at, 1, {width}), COUNT(*), COALESCE(SUM(latency), 0), COUNT(latency), COALESCE(SUM(tokens), 0)
+            FROM analytics WHERE created_at IS NOT NULL GROUP BY substr(created_at, 1, {width})
+        """, (name,))
+    logger.info("Backfilled analytics rollups")
+
+
+def _backfill_models(c):
+    c.execute("""
+        INSERT INTO analytics_model_totals
+            (model, requests, latency_sum, ttft_sum, ttft_count, prompt_tokens_sum, eval_tokens_sum, eval_seconds_sum)
+        SELECT model, COUNT(*), COALESCE(SUM(latency), 0), COALESCE(SUM(ttft), 0), COUNT(ttft),
+               COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(CASE WHEN eval_seconds IS NOT NULL THEN tokens END), 0),
+               COALESCE(SUM(eval_seconds), 0)
+        FROM analytics WHERE model IS NOT NULL GROUP BY model
+    """)
+
+
+class AnalyticsWriter:
+    def __init__(self, batch_size=ANALYTICS_BATCH_SIZE, flush_ms=ANALYTICS_FLUSH_MS, max_queue=ANALYTICS_QUEUE_MAX):
+        self.batch_size = batch_size
+        self.flush = flush_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = Lock()
+        self._thread = None
+        self._stopping = False
+        self._written = 0
+        self._dropped = 0
+        self._batches = 0
+        self._last_prune = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = Thread(target=self._loop, name="analytics-writer", daemon=True)
+                self._thread.start()
+
+    def record(self, row):
+        """Queue one analytics row; returns False (and drops it) if the queue is full."""
+        row = {k: row.get(k) for k in ANALYTICS_COLUMNS}
+        row["created_at"] = datetime.datetime.utcnow().isoformat()
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            logger.warning("Analytics queue full, dropping row")
+            return False
+
+    def _loop(self):
+        conn = _connect()
+        try:
+            while not (self._stopping and self._queue.empty()):
+                try:
+                    batch = [self._queue.get(timeout=0.5)]
+                except queue.Empty:
+                    continue
+                deadline = time.monotonic() + self.flush
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                try:
+                    self._write(conn, batch)
+                except Exception:
+                    logger.exception("Analytics batch of %d rows failed", len(batch))
+                    conn.rollback()
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        columns = ANALYTICS_COLUMNS + ("created_at",)
+        rollups = {}
+        models = {}
+        totals = [0, 0.0, 0, 0]
+        for row in batch:
+            if row.get("model"):
+                has_eval = row.get("eval_seconds") is not None
+                m_delta = (
+                    1, row.get("latency") or 0.0, row.get("ttft") or 0.0, 1 if row.get("ttft") is not None else 0,
+                    row.get("prompt_tokens") or 0, (row.get("tokens") or 0) if has_eval else 0,
+                    row.get("eval_seconds") or 0.0,
+                )
+                models[row["model"]] = [a + b for a, b in zip(models.get(row["model"], (0,) * 7), m_delta)]
+            latency, tokens = row.get("latency"), row.get("tokens") or 0
+            delta = (1, latency or 0.0, 1 if latency is not None else 0, tokens)
+            totals = [a + b for a, b in zip(totals, delta)]
+            for name, width in GRANULARITIES.items():
+                key = (name, row["created_at"][:width])
+                rollups[key] = [a + b for a, b in zip(rollups.get(key, (0, 0.0, 0, 0)), delta)]
+        with conn:
+            conn.executemany(
+                f"INSERT INTO analytics ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [tuple(row.get(col) for col in columns) for row in batch],
+            )
+            conn.executemany("""
+                INSERT INTO analytics_rollup (granularity, bucket, requests, latency_sum, latency_count, tokens_sum)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (granularity, bucket) DO UPDATE SET
+                    requests = requests + excluded.requests,
+                    latency_sum = latency_sum + excluded.latency_sum,
+                    latency_count = latency_count + excluded.latency_count,
+                    tokens_sum = tokens_sum + excluded.tokens_sum
+            """, [key + tuple(v) for key, v in rollups.items()])
+            conn.execute("""
+                UPDATE analytics_totals SET requests = requests + ?, latency_sum = latency_sum + ?,
+                    latency_count = latency_count + ?, tokens_sum = tokens_sum + ? WHERE id = 1
+            """, totals)
+            if models:
+                conn.executemany("""
+                    INSERT INTO analytics_model_totals
+                        (model, requests, latency_sum, ttft_sum, ttft_count, prompt_tokens_sum, eval_tokens_sum, eval_seconds_sum)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (model) DO UPDATE SET
+                        requests = requests + excluded.requests,
+                        latency_sum = latency_sum + excluded.latency_sum,
+                        ttft_sum = ttft_sum + excluded.ttft_sum,
+                        ttft_count = ttft_count + excluded.ttft_count,
+                        prompt_tokens_sum = prompt_tokens_sum + excluded.prompt_tokens_sum,
+                        eval_tokens_sum = eval_tokens_sum + excluded.eval_tokens_sum,
+                        eval_seconds_sum = eval_seconds_sum + excluded.eval_seconds_sum
+                """, [(model,) + tuple(v) for model, v in models.items()])
+            self._prune(conn)
+        with self._lock:
+            self._written += len(batch)
+            self._batches += 1
+
+    def _prune(self, conn):
+        # minute buckets are only kept for ANALYTICS_MINUTE_RETENTION_DAYS; checked at most hourly
+        now = time.time()
+        if ANALYTICS_MINUTE_RETENTION_DAYS <= 0 or now - self._last_prune < 3600:
+            return
+        self._last_prune = now
+        cutoff = (datetime.datetime.utcnow() - datetime.timedelta(days=ANALYTICS_MINUTE_RETENTION_DAYS)).isoformat()
+        conn.execute("DELETE FROM analytics_rollup WHERE granularity = 'minute' AND bucket < ?", (cutoff[:16],))
+
+    def stop(self, timeout=10):
+        """Flush queued rows and stop the writer thread."""
+        with self._lock:
+            thread, self._stopping = self._thread, True
+        if thread is not None:
+            thread.join(timeout)
+        with self._lock:
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self._written,
+                "dropped": self._dropped,
+                "batches": self._batches,
+            }
+
+
+writer = AnalyticsWriter()
+
+_read_conn = None
+_read_lock = Lock()
+
+
+def _query(sql, params=()):
+    global _read_conn
+    with _read_lock:
+        if _read_conn is None:
+            _read_conn = _connect()
+        return _read_conn.execute(sql, params).fetchall()
+
+
+def totals():
+    row = _query("SELECT requests, latency_sum, latency_count, tokens_sum FROM analytics_totals WHERE id = 1")
+    requests, latency_sum, latency_count, tokens_sum = row[0] if row else (0, 0.0, 0, 0)
+    return {
+        "requests": requests,
+        "avg_latency": latency_sum / latency_count if latency_count else 0.0,
+        "tokens": tokens_sum,
+    }
+
+
+def timeline(limit=50):
+    rows = _query("""
+        SELECT created_at, user_id, message, latency, tokens
+        FROM analytics
+        ORDER BY created_at DESC
+        LIMIT ?
+    """, (limit,))
+    return [
+        {"timestamp": r[0], "user_id": r[1], "message": r[2], "latency": r[3], "tokens": r[4]}
+        for r in rows
+    ]
+
+
+def rollups(granularity="minute", limit=60):
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    rows = _query("""
+        SELECT bucket, requests, latency_sum, latency_count, tokens_sum
+        FROM analytics_rollup WHERE granularity = ?
+        ORDER BY bucket DESC LIMIT ?
+    """, (granularity, limit))
+    return [
+        {
+            "bucket": r[0],
+            "requests": r[1],
+            "avg_latency": r[2] / r[3] if r[3] else 0.0,
+            "tokens": r[4],
+        }
+        for r in rows
+    ]
+
+
+def model_throughput():
+    """Per-model request count, average latency / TTFT / prompt size and decode tokens/sec."""
+    rows = _query("""
+        SELECT model, requests, latency_sum, ttft_sum, ttft_count, prompt_tokens_sum, eval_tokens_sum, eval_seconds_sum
+        FROM analytics_model_totals ORDER BY requests DESC
+    """)
+    return [
+        {
+            "model": r[0],
+            "requests": r[1],
+            "avg_latency": r[2] / r[1] if r[1] else 0.0,
+            "avg_ttft": r[3] / r[4] if r[4] else None,
+            "avg_prompt_tokens": r[5] / r[1] if r[1] else 0.0,
+            "eval_tokens": r[6],
+            "tokens_per_s": r[6] / r[7] if r[7] else None,
+        }
+        for r in rows
+    ]
+
+
+def recent_generations(model=None, limit=50):
+    """Most recent server-recorded generations, optionally for one model."""
+    sql = """
+        SELECT created_at, request_id, route, session_id, model, latency, ttft, prompt_tokens, tokens, tokens_per_s
+        FROM analytics WHERE model IS NOT NULL {} ORDER BY created_at DESC LIMIT ?
+    """
+    rows = _query(sql.format("AND model = ?"), (model, limit)) if model else _query(sql.format(""), (limit,))
+    keys = ("timestamp", "request_id", "route", "session_id", "model", "latency", "ttft", "prompt_tokens", "tokens", "tokens_per_s")
+    return [dict(zip(keys, r)) for r in rows]
+
+
+def close():
+    global _read_conn
+    writer.stop()
+    with _read_lock:
+        if _read_conn is not None:
+            _read_conn.close()
+            _read_conn = None
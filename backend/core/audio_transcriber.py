@@ -1,97 +1,523 @@
-import io
 import os
+import subprocess
 import tempfile
 import base64
+import hashlib
+import json
+import multiprocessing
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from collections import OrderedDict
+from threading import Lock, Thread
+import numpy as np
 from ..core.logger import logger
-from ..core.config import FFMPEG_PATH
-import whisper
-from pydub import AudioSegment
+from ..core import readiness
+from ..core.metrics import timed, record_cache
+from ..core.config import (
+    FFMPEG_PATH, WHISPER_MEMORY_BUDGET_MB, WHISPER_PRELOAD,
+    TRANSCRIPT_CACHE_DIR, MEDIA_TRANSCRIBE_MODEL, LONG_AUDIO_SECONDS,
+    SEGMENT_TARGET_SECONDS, SEGMENT_MAX_SECONDS, TRANSCRIBE_PROCESSES, TRANSCRIBE_THREADS_PER_PROCESS,
+    LIVE_WINDOW_SECONDS, LIVE_OVERLAP_SECONDS, LIVE_TRANSCRIBE_WORKERS,
+    LIVE_SESSION_TTL_SECONDS, LIVE_SESSION_MAX_BYTES, LIVE_TOTAL_MAX_BYTES, LIVE_SWEEP_INTERVAL_SECONDS,
+)
 
 # Ensure ffmpeg path is available to subprocesses (try to help Whisper)
 if FFMPEG_PATH:
     ff_dir = os.path.dirname(FFMPEG_PATH)
     os.environ["PATH"] = ff_dir + os.pathsep + os.environ.get("PATH", "")
 
-# load whisper model lazily
-_whisper_model = None
+# --------------------------------------------------------------------
+# Whisper model pool
+# --------------------------------------------------------------------
+# Models are cached per size in an LRU bounded by WHISPER_MEMORY_BUDGET_MB.
+# A per-size load lock makes concurrent first requests share one load.
+# Model copies held by segment worker processes are reserved against the same
+# budget (see get_segment_pool), so in-process models are evicted to make room.
+class WhisperModelPool:
+    def __init__(self, budget_mb=WHISPER_MEMORY_BUDGET_MB):
+        self.budget = budget_mb * 1024 * 1024
+        self._models = OrderedDict()  # size -> model, least recently used first
+        self._bytes = {}
+        self._lock = Lock()
+        self._load_locks = {}
+        # whisper's decoder installs kv-cache hooks on the shared modules, so
+        # decodes on one model instance must not overlap
+        self._transcribe_locks = {}
+        self._reserved = {}  # name -> bytes held outside this process (segment workers)
+
+    def get(self, size="small"):
+        with self._lock:
+            if size in self._models:
+                self._models.move_to_end(size)
+                return self._models[size]
+            load_lock = self._load_locks.setdefault(size, Lock())
+        with load_lock:
+            with self._lock:
+                if size in self._models:
+                    self._models.move_to_end(size)
+                    return self._models[size]
+            readiness.set_state(f"whisper:{size}", "loading")
+            try:
+                import whisper
+                model = whisper.load_model(size)
+            except Exception as e:
+                readiness.set_state(f"whisper:{size}", "failed", e)
+                logger.exception("Failed to load Whisper model %s", size)
+                raise
+            readiness.set_state(f"whisper:{size}", "ready")
+            nbytes = sum(p.numel() * p.element_size() for p in model.parameters())
+            with self._lock:
+                self._models[size] = model
+                self._bytes[size] = nbytes
+                self._evict(keep=size)
+            logger.info("Loaded Whisper model: %s (%.0f MB)", size, nbytes / 1e6)
+            return model
+
+    def transcribe(self, size, audio, **options):
+        """Run model.transcribe on the shared `size` model, one call at a time per model."""
+        model = self.get(size)
+        with self._lock:
+            transcribe_lock = self._transcribe_locks.setdefault(size, Lock())
+        with transcribe_lock:
+            return model.transcribe(audio, **options)
+
+    def reserve(self, name, nbytes):
+        """Count memory used elsewhere (e.g. worker processes) against the budget."""
+        with self._lock:
+            self._reserved[name] = nbytes
+            self._evict(keep=None)
+
+    def available(self):
+        """Budget bytes not reserved by worker processes."""
+        with self._lock:
+            return self.budget - sum(self._reserved.values())
+
+    def _evict(self, keep):
+        while sum(self._bytes.values()) + sum(self._reserved.values()) > self.budget and self._models \
+                and (len(self._models) > 1 or keep is None):
+            victim = next(s for s in self._models if s != keep)
+            self._models.pop(victim)
+            self._bytes.pop(victim, None)
+            readiness.set_state(f"whisper:{victim}", "not_loaded")
+            logger.info("Evicted Whisper model %s (memory budget %d MB)", victim, self.budget // (1024 * 1024))
+
+    def preload(self, sizes):
+        for size in sizes:
+            try:
+                self.get(size)
+            except Exception:
+                logger.warning("Whisper preload failed for %s", size)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": list(self._models.keys()),
+                "bytes": sum(self._bytes.values()) + sum(self._reserved.values()),
+                "worker_bytes": dict(self._reserved),
+                "budget_bytes": self.budget,
+            }
+
+
+whisper_pool = WhisperModelPool()
+
 def get_whisper_model(size="small"):
-    global _whisper_model
-    if _whisper_model is None:
+    return whisper_pool.get(size)
+
+def preload_whisper_models(sizes=None):
+    """Warm the pool in a background thread (WHISPER_PRELOAD by default)."""
+    sizes = WHISPER_PRELOAD if sizes is None else sizes
+    if sizes:
+        Thread(target=whisper_pool.preload, args=(sizes,), name="whisper-preload", daemon=True).start()
+
+# --------------------------------------------------------------------
+# In-memory decoding
+# --------------------------------------------------------------------
+SAMPLE_RATE = 16000
+FFMPEG_BIN = FFMPEG_PATH or "ffmpeg"
+
+def decode_audio_bytes(file_bytes, sr=SAMPLE_RATE):
+    """
+    Decode any ffmpeg-readable audio/video bytes straight to a mono float32 array
+    at `sr` Hz (the format Whisper expects), piping through ffmpeg without temp files.
+    Containers that need a seekable input (e.g. MP4 with the index at the end) fall
+    back to a temporary file.
+    """
+    cmd = [
+        FFMPEG_BIN, "-nostdin", "-threads", "0", "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr), "pipe:1",
+    ]
+    proc = subprocess.run(cmd, input=file_bytes, capture_output=True)
+    out = proc.stdout
+    if proc.returncode != 0 or not out:
+        logger.info("ffmpeg could not decode from pipe, retrying via temp file")
+        fd, tmpname = tempfile.mkstemp()
         try:
-            _whisper_model = whisper.load_model(size)
-            logger.info("Loaded Whisper model: %s", size)
-        except Exception as e:
-            logger.exception("Failed to load Whisper model")
-            raise
-    return _whisper_model
+            with os.fdopen(fd, "wb") as f:
+                f.write(file_bytes)
+            cmd[cmd.index("pipe:0")] = tmpname
+            out = subprocess.run(cmd, capture_output=True, check=True).stdout
+        finally:
+            try:
+                os.remove(tmpname)
+            except OSError:
+                pass
+    return np.frombuffer(out, dtype=np.int16).astype(np.float32) / 32768.0
+
+def transcribe_pcm(audio, model_size="small", language=None, task="transcribe"):
+    """Transcribe an already decoded 16 kHz float32 array in this process."""
+    options = {"task": task}
+    if language:
+        options["language"] = language
+    res = whisper_pool.transcribe(model_size, audio, **options)
+    return res.get("text", "")
 
 def transcribe_audio_bytes(file_bytes, model_size="small", language=None, task="transcribe"):
     """
     Single-shot transcription: accepts raw audio bytes (wav, mp3, m4a).
+    Audio is decoded in memory and handed to Whisper as a float32 array.
     """
     try:
-        # write tmp file with proper extension by trying to detect format via pydub
-        tmpfd, tmpname = tempfile.mkstemp(suffix=".wav")
-        os.close(tmpfd)
-        # use pydub to convert bytes to wav
-        audio = AudioSegment.from_file(io.BytesIO(file_bytes))
-        audio.export(tmpname, format="wav")
-        model = get_whisper_model(model_size)
-        options = {"task": task}
-        if language:
-            options["language"] = language
-        res = model.transcribe(tmpname, **options)
-        text = res.get("text", "")
-        # cleanup
-        try:
-            os.remove(tmpname)
-        except:
-            pass
-        return text
+        return transcribe_pcm(decode_audio_bytes(file_bytes), model_size, language, task)
     except Exception as e:
         logger.exception("Whisper transcription failed")
         return ""
 
-# Simple chunked appending transcription helper for "live" mode
-# Server-side we append received audio chunks to a temp file and when final==true we transcribe
-_live_buffers = {}  # session_id -> temp file path
+# --------------------------------------------------------------------
+# Long audio: silence-based segmentation + process pool
+# --------------------------------------------------------------------
+def split_on_silence(audio, sr=SAMPLE_RATE, target_s=SEGMENT_TARGET_SECONDS, max_s=SEGMENT_MAX_SECONDS):
+    """
+    Energy-based VAD split. Each cut is placed at the quietest 30 ms frame between
+    target_s/2 and max_s after the previous cut, so segments end in pauses.
+    Returns a list of (start_sample, end_sample).
+    """
+    frame = int(0.03 * sr)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+    energy = np.sqrt(np.mean(audio[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+    min_f = max(1, int(target_s / 2 * sr / frame))
+    max_f = max(min_f + 1, int(max_s * sr / frame))
+    bounds, start = [], 0
+    while n_frames - start > max_f:
+        lo, hi = start + min_f, start + max_f
+        cut = lo + int(np.argmin(energy[lo:hi]))
+        bounds.append((start * frame, cut * frame))
+        start = cut
+    bounds.append((start * frame, len(audio)))
+    return bounds
 
-def append_chunk_and_maybe_transcribe(session_id: str, chunk_b64: str, final: bool = False, model_size="small"):
+
+# approximate fp32 parameter memory per model size, used to size segment pools
+WHISPER_MODEL_MB = {
+    "tiny": 75, "base": 145, "small": 485, "medium": 1530,
+    "large": 3090, "large-v1": 3090, "large-v2": 3090, "large-v3": 3090, "turbo": 1620,
+}
+
+_segment_pools = {}  # model size -> ProcessPoolExecutor (None: no room in the budget)
+_segment_pool_lock = Lock()
+
+def _init_segment_worker(threads):
+    import torch
+    torch.set_num_threads(threads)
+
+def get_segment_pool(model_size):
     """
-    Accept base64-encoded audio chunk, append to a per-session buffer and, if final True, transcribe.
-    Returns None if not final, otherwise returns transcript string.
+    Process pool for `model_size`. Every worker loads its own copy of the model,
+    so the pool gets at most as many processes as fit in the part of
+    WHISPER_MEMORY_BUDGET_MB not yet reserved by other pools (capped by
+    TRANSCRIBE_PROCESSES), and reserves that memory. Returns None when not even
+    one copy fits; callers then transcribe in-process.
     """
+    with _segment_pool_lock:
+        if model_size not in _segment_pools:
+            per_model = WHISPER_MODEL_MB.get(model_size, WHISPER_MODEL_MB["large"]) * 1024 * 1024
+            processes = min(TRANSCRIBE_PROCESSES, whisper_pool.available() // per_model)
+            pool = None
+            if processes >= 1:
+                # spawn: forking a process that already initialized torch threads can deadlock
+                pool = ProcessPoolExecutor(
+                    max_workers=processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_segment_worker,
+                    initargs=(TRANSCRIBE_THREADS_PER_PROCESS,),
+                )
+                whisper_pool.reserve(f"segment-workers:{model_size}", processes * per_model)
+                logger.info("Segment pool for Whisper %s: %d processes", model_size, processes)
+            else:
+                logger.warning("No Whisper memory budget left for %s segment workers, transcribing in-process", model_size)
+            _segment_pools[model_size] = pool
+        return _segment_pools[model_size]
+
+def _transcribe_segment(audio, offset_s, model_size, language, task):
+    """Worker: transcribe one segment; timestamps are shifted by offset_s."""
+    options = {"task": task, "fp16": False}
+    if language:
+        options["language"] = language
+    res = whisper_pool.transcribe(model_size, audio, **options)
+    segments = [
+        {"start": offset_s + sg["start"], "end": offset_s + sg["end"], "text": sg.get("text", "").strip()}
+        for sg in res.get("segments", [])
+    ]
+    return {"text": res.get("text", "").strip(), "segments": segments}
+
+def transcribe_segmented(audio, model_size="small", language=None, task="transcribe"):
+    """
+    Split decoded audio on silence and transcribe the parts in parallel across
+    the process pool. Yields {"index", "start", "end", "text", "segments"} in
+    completion order; callers stitch by index.
+    """
+    bounds = split_on_silence(audio)
+    logger.info("Transcribing %.0fs of audio as %d segments", len(audio) / SAMPLE_RATE, len(bounds))
+    pool = get_segment_pool(model_size)
+    if pool is None:
+        for i, (a, b) in enumerate(bounds):
+            res = _transcribe_segment(audio[a:b], a / SAMPLE_RATE, model_size, language, task)
+            yield {"index": i, "total": len(bounds), "start": a / SAMPLE_RATE, "end": b / SAMPLE_RATE, **res}
+        return
+    futures = {
+        pool.submit(_transcribe_segment, audio[a:b], a / SAMPLE_RATE, model_size, language, task): (i, a, b)
+        for i, (a, b) in enumerate(bounds)
+    }
     try:
-        b = base64.b64decode(chunk_b64)
-        if session_id not in _live_buffers:
-            fd, path = tempfile.mkstemp(suffix=".wav")
-            os.close(fd)
-            _live_buffers[session_id] = path
-        else:
-            path = _live_buffers[session_id]
-
-        # Append chunk - pydub helps unify
-        seg = AudioSegment.from_file(io.BytesIO(b))
-        if os.path.exists(path) and os.path.getsize(path) > 0:
-            existing = AudioSegment.from_file(path)
-            combined = existing + seg
-            combined.export(path, format="wav")
-        else:
-            seg.export(path, format="wav")
+        for fut in as_completed(futures):
+            i, a, b = futures[fut]
+            res = fut.result()
+            yield {"index": i, "total": len(bounds), "start": a / SAMPLE_RATE, "end": b / SAMPLE_RATE, **res}
+    finally:
+        for fut in futures:
+            fut.cancel()
 
-        if final:
-            model = get_whisper_model(model_size)
-            res = model.transcribe(path)
-            text = res.get("text", "")
-            # cleanup
-            try:
-                os.remove(path)
-            except:
-                pass
-            _live_buffers.pop(session_id, None)
-            return text
+def stitch_segments(parts):
+    """Join segment results (any order) into one transcript and timestamped segment list."""
+    parts = sorted(parts, key=lambda p: p["index"])
+    text = " ".join(p["text"] for p in parts if p["text"])
+    return text, [sg for p in parts for sg in p["segments"]]
+
+# --------------------------------------------------------------------
+# Media ingestion: transcripts cached by content hash
+# --------------------------------------------------------------------
+def _transcript_cache_path(content_hash, model_size):
+    return os.path.join(TRANSCRIPT_CACHE_DIR, f"{content_hash}_{model_size}.json")
+
+def transcribe_media(file_bytes, model_size=MEDIA_TRANSCRIBE_MODEL):
+    """
+    Transcribe audio/video bytes to {"text", "segments", "content_hash"}, where
+    segments carry start/end seconds. Results are cached on disk by content hash
+    and model size, so re-ingesting (or re-chunking) never re-runs Whisper.
+    """
+    content_hash = hashlib.sha256(file_bytes).hexdigest()
+    path = _transcript_cache_path(content_hash, model_size)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                logger.info("Transcript cache hit for %s", content_hash)
+                transcript = json.load(f)
+            record_cache("transcript", True)
+            return transcript
+        except Exception:
+            logger.exception("Failed to read cached transcript %s", path)
+    record_cache("transcript", False)
+
+    with timed("transcription"):
+        audio = decode_audio_bytes(file_bytes)
+        if len(audio) > LONG_AUDIO_SECONDS * SAMPLE_RATE:
+            text, segments = stitch_segments(list(transcribe_segmented(audio, model_size=model_size)))
         else:
-            return None
+            res = _transcribe_segment(audio, 0.0, model_size, None, "transcribe")
+            text, segments = res["text"], res["segments"]
+
+    transcript = {"content_hash": content_hash, "model": model_size, "text": text, "segments": segments}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(transcript, f)
+    os.replace(tmp, path)
+    return transcript
+
+# --------------------------------------------------------------------
+# Live (incremental) transcription
+# --------------------------------------------------------------------
+# Each session keeps an in-memory 16 kHz mono float32 buffer holding only the
+# audio that is not yet committed to the transcript. Once LIVE_WINDOW_SECONDS of
+# uncommitted audio is buffered, a background worker transcribes that window and
+# commits the Whisper segments that end before the last LIVE_OVERLAP_SECONDS;
+# the tail is re-transcribed as the head of the next window, so words cut at a
+# window edge are not lost. Finalizing only has to transcribe the last window.
+#
+# Sessions idle for LIVE_SESSION_TTL_SECONDS are evicted by a background sweeper;
+# buffered audio is capped per session (LIVE_SESSION_MAX_BYTES) and across all
+# sessions (LIVE_TOTAL_MAX_BYTES).
+class LiveSessionLimitError(Exception):
+    def __init__(self, message, status_code=413):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _LiveSession:
+    def __init__(self, model_size):
+        self.model_size = model_size
+        self.pcm = np.zeros(0, dtype=np.float32)  # uncommitted audio only
+        self.offset = 0  # absolute sample index of pcm[0]
+        self.texts = []  # committed transcript pieces
+        self.lock = Lock()
+        self.job = None
+        self.last_seen = time.monotonic()
+
+    def buffered_bytes(self):
+        return self.pcm.nbytes
+
+    def transcript(self):
+        return " ".join(t for t in self.texts if t).strip()
+
+    def _transcribe(self, audio):
+        prompt = self.transcript()[-200:] or None
+        return whisper_pool.transcribe(self.model_size, audio, initial_prompt=prompt, fp16=False)
+
+    def process_windows(self, final=False):
+        """Transcribe buffered windows; with final=True also flush the tail."""
+        window = int(LIVE_WINDOW_SECONDS * SAMPLE_RATE)
+        cut = max(1.0, LIVE_WINDOW_SECONDS - LIVE_OVERLAP_SECONDS)
+        while True:
+            with self.lock:
+                audio = self.pcm[:window].copy()
+            if len(audio) == 0 or (len(audio) < window and not final):
+                return
+            segments = self._transcribe(audio).get("segments", [])
+            last_window = final and len(audio) < window
+            if last_window:
+                keep, consumed = segments, len(audio)
+            else:
+                keep = [sg for sg in segments if sg["end"] <= cut]
+                consumed = int(keep[-1]["end"] * SAMPLE_RATE) if keep else 0
+                if consumed <= 0:
+                    # nothing usable ends before the cut: commit the segments starting
+                    # before it and consume through the last of them (at least up to the
+                    # cut), so straddling words are not transcribed again next window
+                    keep = [sg for sg in segments if sg["start"] < cut]
+                    consumed = int(cut * SAMPLE_RATE)
+                    if keep:
+                        consumed = max(consumed, int(keep[-1]["end"] * SAMPLE_RATE))
+                    consumed = min(consumed, len(audio))
+            with self.lock:
+                self.texts.extend(sg.get("text", "").strip() for sg in keep)
+                self.pcm = self.pcm[consumed:]
+                self.offset += consumed
+            if last_window:
+                return
+
+
+_live_sessions = {}  # session_id -> _LiveSession
+_live_lock = Lock()
+_live_pool = ThreadPoolExecutor(max_workers=max(1, LIVE_TRANSCRIBE_WORKERS), thread_name_prefix="live-whisper")
+
+
+def append_chunk_and_maybe_transcribe(session_id: str, chunk_b64: str, final: bool = False, model_size="small"):
+    """
+    Accept base64-encoded audio chunk, append it to the session's in-memory buffer and
+    schedule background transcription of full windows. Only decodes: Whisper runs on
+    the live workers. With final=True no window is scheduled; call
+    finish_live_session afterwards for the full transcript.
+    Returns the partial transcript so far.
+    Raises LiveSessionLimitError when a buffer cap would be exceeded.
+    """
+    try:
+        pcm = decode_audio_bytes(base64.b64decode(chunk_b64))
+        with _live_lock:
+            sess = _live_sessions.get(session_id)
+            total = sum(s.buffered_bytes() for s in _live_sessions.values())
+            if total + pcm.nbytes > LIVE_TOTAL_MAX_BYTES:
+                raise LiveSessionLimitError("Live transcription capacity exhausted, retry later.", status_code=503)
+            if sess is None:
+                sess = _LiveSession(model_size)
+                _live_sessions[session_id] = sess
+            sess.last_seen = time.monotonic()
+
+        with sess.lock:
+            if sess.buffered_bytes() + pcm.nbytes > LIVE_SESSION_MAX_BYTES:
+                raise LiveSessionLimitError(
+                    f"Session {session_id} exceeds {LIVE_SESSION_MAX_BYTES} bytes of untranscribed audio."
+                )
+            sess.pcm = np.concatenate([sess.pcm, pcm])
+            job = sess.job
+            window_ready = len(sess.pcm) >= int(LIVE_WINDOW_SECONDS * SAMPLE_RATE)
+            if not final and window_ready and (job is None or job.done()):
+                sess.job = _live_pool.submit(sess.process_windows)
+
+        return sess.transcript()
+    except LiveSessionLimitError:
+        raise
     except Exception:
         logger.exception("Chunk append/transcribe failed")
         return "[ERROR]"
+
+
+def _finish_session(session_id, sess):
+    try:
+        job = sess.job
+        if job is not None:
+            # submitted to the same FIFO pool before us, so it is already running or done
+            job.result()
+        sess.process_windows(final=True)
+        return sess.transcript()
+    except Exception:
+        logger.exception("Final live transcription failed")
+        return "[ERROR]"
+    finally:
+        with _live_lock:
+            if _live_sessions.get(session_id) is sess:
+                _live_sessions.pop(session_id, None)
+
+
+def finish_live_session(session_id: str):
+    """
+    Flush a live session on the live workers (after its pending window) and drop it.
+    Returns a concurrent Future of the full transcript.
+    """
+    with _live_lock:
+        sess = _live_sessions.get(session_id)
+    if sess is None:
+        fut = Future()
+        fut.set_result("")
+        return fut
+    return _live_pool.submit(_finish_session, session_id, sess)
+
+
+def evict_idle_sessions(ttl=LIVE_SESSION_TTL_SECONDS):
+    """Drop live sessions that have not received audio for `ttl` seconds."""
+    now = time.monotonic()
+    with _live_lock:
+        idle = [sid for sid, s in _live_sessions.items() if now - s.last_seen > ttl]
+        for sid in idle:
+            _live_sessions.pop(sid, None)
+    if idle:
+        logger.info("Evicted %d idle live transcription sessions", len(idle))
+    return len(idle)
+
+
+def _sweep_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            evict_idle_sessions()
+        except Exception:
+            logger.exception("Live session sweep failed")
+
+
+_sweeper = None
+def start_live_session_sweeper(interval=LIVE_SWEEP_INTERVAL_SECONDS):
+    global _sweeper
+    if _sweeper is None:
+        _sweeper = Thread(target=_sweep_loop, args=(interval,), name="live-session-sweeper", daemon=True)
+        _sweeper.start()
+
+
+def live_session_stats():
+    with _live_lock:
+        sessions = list(_live_sessions.values())
+    return {
+        "sessions": len(sessions),
+        "buffered_bytes": sum(s.buffered_bytes() for s in sessions),
+        "max_session_bytes": LIVE_SESSION_MAX_BYTES,
+        "max_total_bytes": LIVE_TOTAL_MAX_BYTES,
+        "ttl_seconds": LIVE_SESSION_TTL_SECONDS,
+    }
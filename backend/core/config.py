@@ -16,6 +16,8 @@ EMBEDDINGS_DIR = os.getenv("EMBEDDINGS_DIR", os.path.join(BASE_DIR, "..", "data"
 FAISS_INDEX_FILE = os.path.join(EMBEDDINGS_DIR, "embed_index.faiss")
 IMAGE_INDEX_FILE = os.path.join(EMBEDDINGS_DIR, "image_index.faiss")
 CHUNK_STORE_FILE = os.path.join(EMBEDDINGS_DIR, "chunk_store.pkl")
+# versioned index generations; the manifest names the current one (see core/index_store.py)
+INDEX_MANIFEST_FILE = os.path.join(EMBEDDINGS_DIR, "manifest.json")
 
 DB_PATH = os.getenv("DB_PATH", os.path.join(BASE_DIR, "..", "data", "app.db"))
 
@@ -29,22 +31,164 @@ OLLAMA_TEXT_MODEL = os.getenv("OLLAMA_TEXT_MODEL", "llama3:latest")
 OLLAMA_VISION_MODEL = os.getenv("OLLAMA_VISION_MODEL", "llama3.2-vision")
 OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
 
+# LLM admission control (in front of every Ollama call)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 2))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 16))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 60))
+LLM_RETRY_AFTER = int(os.getenv("LLM_RETRY_AFTER", 5))
+
+# hierarchical (map-reduce) summarization
+SUMMARY_GROUP_CHARS = int(os.getenv("SUMMARY_GROUP_CHARS", 6000))
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", 2))
+SUMMARY_MAX_GROUPS = int(os.getenv("SUMMARY_MAX_GROUPS", 24))
+SUMMARY_CALL_TIMEOUT = float(os.getenv("SUMMARY_CALL_TIMEOUT", 120))
+
+# micro-batched non-streaming inference (/api/infer)
+INFER_BATCH_WINDOW_MS = int(os.getenv("INFER_BATCH_WINDOW_MS", 20))
+INFER_MAX_BATCH = int(os.getenv("INFER_MAX_BATCH", 32))
+INFER_PARALLELISM = int(os.getenv("INFER_PARALLELISM", 2))
+INFER_MAX_PENDING = int(os.getenv("INFER_MAX_PENDING", 1024))
+INFER_TIMEOUT = float(os.getenv("INFER_TIMEOUT", 300))
+
+# embedding micro-batcher: concurrent small embed calls share one forward pass;
+# calls with EMBED_MAX_BATCH or more texts are encoded directly
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "true").lower() in ("1", "true", "yes")
+EMBED_BATCH_WINDOW_MS = int(os.getenv("EMBED_BATCH_WINDOW_MS", 5))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", 64))
+EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", 60))
+
+# text embedder backend: "torch" (sentence-transformers) or "onnx" (ONNX Runtime,
+# exported once and optionally int8-quantized; falls back to torch when the
+# output is not within EMBED_ONNX_MIN_COSINE of the torch model)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+EMBED_ONNX_QUANTIZE = os.getenv("EMBED_ONNX_QUANTIZE", "true").lower() in ("1", "true", "yes")
+EMBED_ONNX_THREADS = int(os.getenv("EMBED_ONNX_THREADS", 0))  # 0 = onnxruntime default
+EMBED_ONNX_MIN_COSINE = float(os.getenv("EMBED_ONNX_MIN_COSINE", 0.99))
+EMBED_ONNX_DIR = os.path.join(EMBEDDINGS_DIR, "onnx")
+
+# sharded multi-process encoding for large ingests: embed calls with at least
+# ENCODE_SHARDED_MIN_TEXTS texts are split into ENCODE_SHARD_SIZE shards over
+# ENCODE_PROCESSES workers (each with its own model copy); <= 1 disables it
+ENCODE_PROCESSES = int(os.getenv("ENCODE_PROCESSES", max(1, (os.cpu_count() or 2) // 4)))
+ENCODE_THREADS_PER_PROCESS = int(os.getenv("ENCODE_THREADS_PER_PROCESS", 4))
+ENCODE_SHARD_SIZE = int(os.getenv("ENCODE_SHARD_SIZE", 256))
+ENCODE_SHARDED_MIN_TEXTS = int(os.getenv("ENCODE_SHARDED_MIN_TEXTS", 1024))
+
+# URL fetching (url-chat / url-ingest)
+URL_FETCH_TIMEOUT = float(os.getenv("URL_FETCH_TIMEOUT", 30))
+URL_MAX_CONNECTIONS = int(os.getenv("URL_MAX_CONNECTIONS", 32))
+URL_PER_HOST_CONCURRENCY = int(os.getenv("URL_PER_HOST_CONCURRENCY", 4))
+URL_MAX_BYTES = int(os.getenv("URL_MAX_BYTES", 20 * 1024 * 1024))
+URL_CACHE_DIR = os.path.join(EMBEDDINGS_DIR, "url_cache")
+# URLs one url-ingest request fetches and embeds at a time
+URL_INGEST_CONCURRENCY = int(os.getenv("URL_INGEST_CONCURRENCY", 8))
+
+# per-workload executor pools for CPU-bound work (kind: thread | process)
+# whisper and embed share in-process models/index state, keep them as "thread"
+def _pool_conf(name, kind, workers, max_queue):
+    key = name.upper()
+    return {
+        "kind": os.getenv(f"POOL_{key}_KIND", kind),
+        "workers": int(os.getenv(f"POOL_{key}_WORKERS", workers)),
+        "max_queue": int(os.getenv(f"POOL_{key}_QUEUE", max_queue)),
+    }
+
+EXECUTOR_POOLS = {
+    "whisper": _pool_conf("whisper", "thread", 1, 8),
+    "ocr": _pool_conf("ocr", "thread", 2, 32),
+    "extract": _pool_conf("extract", "thread", 2, 16),
+    "embed": _pool_conf("embed", "thread", 1, 64),
+    # live-transcription appends only decode a chunk (ffmpeg); windows run on their own workers
+    "live": _pool_conf("live", "thread", 2, 64),
+}
+POOL_RETRY_AFTER = int(os.getenv("POOL_RETRY_AFTER", 2))
+
+# model names and startup warm-up (models otherwise load lazily on first use)
+TEXT_EMBED_MODEL = os.getenv("TEXT_EMBED_MODEL", "all-MiniLM-L6-v2")
+CLIP_MODEL = os.getenv("CLIP_MODEL", "openai/clip-vit-base-patch32")
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "true").lower() in ("1", "true", "yes")
+WARMUP_CLIP = os.getenv("WARMUP_CLIP", "false").lower() in ("1", "true", "yes")
+
 # limits and chunking
 MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", 200))
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 1000))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 200))
 
+# file-chat ephemeral index cache (keyed by content hash)
+FILE_CACHE_MAX_MB = int(os.getenv("FILE_CACHE_MAX_MB", 256))
+FILE_CHAT_TOP_K = int(os.getenv("FILE_CHAT_TOP_K", 3))
+
 # OCR / audio
 TESSERACT_CMD = os.getenv("TESSERACT_CMD", "")
 FFMPEG_PATH = os.getenv("FFMPEG_PATH", "")
 
+# OCR preprocessing / batch OCR
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", 300))
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", 3000))  # used when the image carries no DPI info
+OCR_GRAYSCALE = os.getenv("OCR_GRAYSCALE", "true").lower() in ("1", "true", "yes")
+OCR_BINARIZE_THRESHOLD = int(os.getenv("OCR_BINARIZE_THRESHOLD", 0))  # 0 disables binarization
+OCR_PROCESSES = int(os.getenv("OCR_PROCESSES", os.cpu_count() or 2))
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", 4096))
+# PDF pages with fewer extracted characters than this are rasterized and OCR'd
+PDF_OCR_MIN_CHARS = int(os.getenv("PDF_OCR_MIN_CHARS", 20))
+PDF_OCR_DPI = int(os.getenv("PDF_OCR_DPI", 200))
+
+# Whisper model pool: LRU by size under a memory budget, optional preload at startup
+WHISPER_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", 4096))
+WHISPER_PRELOAD = [m.strip() for m in os.getenv("WHISPER_PRELOAD", "").split(",") if m.strip()]
+
+# long audio: split on silence and transcribe segments across a process pool.
+# Each process holds its own model copy; pools are shrunk to fit WHISPER_MEMORY_BUDGET_MB.
+LONG_AUDIO_SECONDS = float(os.getenv("LONG_AUDIO_SECONDS", 120))
+SEGMENT_TARGET_SECONDS = float(os.getenv("SEGMENT_TARGET_SECONDS", 30))
+SEGMENT_MAX_SECONDS = float(os.getenv("SEGMENT_MAX_SECONDS", 60))
+TRANSCRIBE_PROCESSES = int(os.getenv("TRANSCRIBE_PROCESSES", max(1, (os.cpu_count() or 2) // 2)))
+TRANSCRIBE_THREADS_PER_PROCESS = int(os.getenv("TRANSCRIBE_THREADS_PER_PROCESS", 2))
+
+# live transcription: windows are transcribed in the background as audio arrives
+LIVE_WINDOW_SECONDS = float(os.getenv("LIVE_WINDOW_SECONDS", 20))
+LIVE_OVERLAP_SECONDS = float(os.getenv("LIVE_OVERLAP_SECONDS", 3))
+LIVE_TRANSCRIBE_WORKERS = int(os.getenv("LIVE_TRANSCRIBE_WORKERS", 1))
+# live session lifecycle: idle TTL, buffered-audio caps and sweeper interval
+LIVE_SESSION_TTL_SECONDS = float(os.getenv("LIVE_SESSION_TTL_SECONDS", 300))
+LIVE_SESSION_MAX_BYTES = int(os.getenv("LIVE_SESSION_MAX_BYTES", 64 * 1024 * 1024))
+LIVE_TOTAL_MAX_BYTES = int(os.getenv("LIVE_TOTAL_MAX_BYTES", 512 * 1024 * 1024))
+LIVE_SWEEP_INTERVAL_SECONDS = float(os.getenv("LIVE_SWEEP_INTERVAL_SECONDS", 30))
+
+MEDIA_EXTENSIONS = set([".mp3", ".wav", ".mp4", ".mov"])
+IMAGE_EXTENSIONS = set([".png", ".jpg", ".jpeg"])
+# threads used for OCR alongside the CLIP forward pass when images are added to the KB
+IMAGE_OCR_THREADS = int(os.getenv("IMAGE_OCR_THREADS", 4))
+# media added to the KB is transcribed once per content hash; transcripts are cached here
+TRANSCRIPT_CACHE_DIR = os.path.join(EMBEDDINGS_DIR, "transcripts")
+MEDIA_TRANSCRIBE_MODEL = os.getenv("MEDIA_TRANSCRIBE_MODEL", "small")
+
 ALLOWED_EXTENSIONS = set([
     ".txt", ".pdf", ".docx", ".csv", ".png", ".jpg", ".jpeg", ".mp3", ".wav", ".mp4", ".mov",
     ".py", ".js", ".md"
 ])
 
+# analytics: rows are queued and batch-committed by a background writer
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", 500))
+ANALYTICS_FLUSH_MS = int(os.getenv("ANALYTICS_FLUSH_MS", 200))
+ANALYTICS_QUEUE_MAX = int(os.getenv("ANALYTICS_QUEUE_MAX", 10000))
+ANALYTICS_MINUTE_RETENTION_DAYS = int(os.getenv("ANALYTICS_MINUTE_RETENTION_DAYS", 7))
+
+# index checkpoints: commits stay in memory and are written as a new generation
+# every CHECKPOINT_INTERVAL_SECONDS, or sooner once CHECKPOINT_MAX_DIRTY records are pending.
+# Writers are blocked only while the vectors added since the last checkpoint are copied;
+# the new generation is the previous one read back from disk plus those rows, so a
+# checkpoint briefly holds a second copy of each index and rewrites its files in full.
+CHECKPOINT_INTERVAL_SECONDS = float(os.getenv("CHECKPOINT_INTERVAL_SECONDS", 30))
+CHECKPOINT_MAX_DIRTY = int(os.getenv("CHECKPOINT_MAX_DIRTY", 1000))
+CHECKPOINT_KEEP_GENERATIONS = int(os.getenv("CHECKPOINT_KEEP_GENERATIONS", 2))
+INDEX_LOCK_STALE_SECONDS = int(os.getenv("INDEX_LOCK_STALE_SECONDS", 600))
+
 # Ensure folders exist
 os.makedirs(os.path.join(BASE_DIR, "..", "data"), exist_ok=True)
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(EMBEDDINGS_DIR, exist_ok=True)
+os.makedirs(URL_CACHE_DIR, exist_ok=True)
+os.makedirs(TRANSCRIPT_CACHE_DIR, exist_ok=True)
+os.makedirs(EMBED_ONNX_DIR, exist_ok=True)
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -0,0 +1,89 @@
+"""
+Cross-request micro-batcher for text embeddings.
+Concurrent embed calls (search queries, retrieve, small ingests) are collected
+for up to EMBED_BATCH_WINDOW_MS or EMBED_MAX_BATCH texts, encoded in one
+forward pass, and each caller's Future is resolved with its own rows.
+"""
+import queue
+import time
+from concurrent.futures import Future
+from threading import Thread, Lock
+from .config import EMBED_BATCH_WINDOW_MS, EMBED_MAX_BATCH
+from .logger import logger
+
+
+class EmbeddingBatcher:
+    def __init__(self, encode_fn, window_ms=EMBED_BATCH_WINDOW_MS, max_batch=EMBED_MAX_BATCH):
+        self.encode_fn = encode_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = Lock()
+        self._thread = None
+        self._batches = 0
+        self._texts = 0
+        self._requests = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._loop, name="embed-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, texts):
+        """Queue a list of texts; returns a Future resolving to their embedding rows."""
+        self._ensure_started()
+        fut = Future()
+        self._queue.put((list(texts), fut))
+        return fut
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._run(batch)
+
+    def _run(self, batch):
+        batch = [(texts, fut) for texts, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        all_texts = [t for texts, _ in batch for t in texts]
+        try:
+            emb = self.encode_fn(all_texts)
+        except Exception as e:
+            logger.exception("Embedding batch of %d texts failed", len(all_texts))
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        with self._lock:
+            self._batches += 1
+            self._texts += len(all_texts)
+            self._requests += len(batch)
+        logger.debug("Encoded embedding batch: %d requests, %d texts", len(batch), len(all_texts))
+        offset = 0
+        for texts, fut in batch:
+            fut.set_result(emb[offset:offset + len(texts)])
+            offset += len(texts)
+
+    def stats(self):
+        with self._lock:
+            batches = self._batches or 1
+            return {
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "requests": self._requests,
+                "texts": self._texts,
+                "avg_batch_texts": self._texts / batches,
+                "avg_batch_requests": self._requests / batches,
+            }
@@ -1,91 +1,154 @@
 """
 EmbeddingManager: handles text & image embeddings, persistence and hybrid retrieval.
+Models are loaded lazily (first use or startup warm-up); CLIP only when image
+features are used. Load state is reported through core.readiness.
 Uses:
  - SentenceTransformer for text embeddings
  - CLIP (transformers) for image embeddings (vision-language)
  - FAISS for dense vector index (text and images stored separately)
  - BM25 (rank_bm25) for sparse retrieval
  - simple persistent chunk_store (pickle)
+Commits update memory immediately; a background checkpointer writes atomic
+generations (see index_store), and generations produced by the offline
+compactor (index_compactor) are hot-reloaded.
 """
+import bisect
 import os
-import pickle
 import numpy as np
-from threading import Lock
-from sentence_transformers import SentenceTransformer
+from threading import Event, Lock, RLock, Thread
 import faiss
-from cachetools import LRUCache, cached
+from cachetools import LRUCache
 from rank_bm25 import BM25Okapi
-from transformers import CLIPModel, CLIPProcessor
-from ..core.config import EMBEDDINGS_DIR, FAISS_INDEX_FILE, IMAGE_INDEX_FILE, CHUNK_STORE_FILE, CHUNK_SIZE, CHUNK_OVERLAP
+from ..core.config import (
+    EMBEDDINGS_DIR, CHUNK_SIZE, CHUNK_OVERLAP, CHECKPOINT_INTERVAL_SECONDS, CHECKPOINT_MAX_DIRTY,
+    TEXT_EMBED_MODEL, CLIP_MODEL, WARMUP_CLIP, EMBED_BATCHING, EMBED_MAX_BATCH, EMBED_TIMEOUT,
+    EMBED_BACKEND, ENCODE_PROCESSES, ENCODE_SHARDED_MIN_TEXTS,
+)
 from ..core.logger import logger
+from ..core import readiness, index_store
+from ..core.metrics import timed, record_cache
+from ..core.embedding_batcher import EmbeddingBatcher
 
 os.makedirs(EMBEDDINGS_DIR, exist_ok=True)
 
 _lock = Lock()
 
+@timed("chunking")
+def chunk_text(text):
+    """
+    Split text into overlapping fixed-size character chunks (CHUNK_SIZE / CHUNK_OVERLAP).
+    """
+    chunks = []
+    i = 0
+    L = len(text)
+    while i < L:
+        chunks.append(text[i:i + CHUNK_SIZE])
+        i += CHUNK_SIZE - CHUNK_OVERLAP
+    return chunks
+
 class EmbeddingManager:
-    def __init__(self):
-        # Text model
-        self._text_model = SentenceTransformer("all-MiniLM-L6-v2")
-        logger.info("Loaded text embedder: all-MiniLM-L6-v2")
-        # CLIP for image embeddings
-        try:
-            self._clip = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-            self._clip_processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-            logger.info("Loaded CLIP vision model")
-        except Exception as e:
+    def __init__(self, shared=None, manifest=None, text_model=None):
+        if shared is not None:
+            # hot reload after compaction: keep the models and caches of the manager being replaced
+            for attr in ("_text_model", "_clip", "_clip_processor", "_clip_error", "_model_lock",
+                         "model_bytes", "emb_cache", "_emb_cache_lock", "batcher"):
+                setattr(self, attr, getattr(shared, attr))
+        else:
+            # Text model and CLIP are loaded lazily (see load_text_model / load_clip)
+            # text_model: any object with SentenceTransformer's encode() (benchmarks, tests)
+            self._text_model = text_model
             self._clip = None
             self._clip_processor = None
-            logger.warning("CLIP not loaded: %s", e)
-
-        # In-memory chunk store: list of dicts {id, source, text, meta}
-        self.chunk_store = self._load_chunk_store()
-        # Build or load faiss index for text embeddings
-        self.text_index, self.text_id_map = self._load_faiss(FAISS_INDEX_FILE)
-        # Image index
-        self.image_index, self.image_id_map = self._load_faiss(IMAGE_INDEX_FILE)
-        # BM25 for sparse search
-        self.bm25 = None
-        self._build_bm25()
-        # small LRU cache for embeddings
-        self.emb_cache = LRUCache(1024)
+            self._clip_error = None
+            self._model_lock = Lock()
+            self.model_bytes = {}
+            # small LRU cache for embeddings
+            # (used from request threads, the embed pool and the batcher thread)
+            self.emb_cache = LRUCache(1024)
+            self._emb_cache_lock = Lock()
+            self.batcher = EmbeddingBatcher(self._encode) if EMBED_BATCHING else None
 
-    def _load_chunk_store(self):
-        if os.path.exists(CHUNK_STORE_FILE):
-            try:
-                with open(CHUNK_STORE_FILE, "rb") as f:
-                    store = pickle.load(f)
-                logger.info("Loaded chunk_store with %d entries", len(store))
-                return store
-            except Exception:
-                logger.exception("Failed loading chunk store")
-        return []
+        self._write_lock = RLock()
+        self._retired = False
+        self._dirty = 0
+        self._load_state(manifest)
+        readiness.set_state("index", "ready")
 
-    def _save_chunk_store(self):
-        with open(CHUNK_STORE_FILE, "wb") as f:
-            pickle.dump(self.chunk_store, f)
-        logger.info("Saved chunk_store (%d chunks) to %s", len(self.chunk_store), CHUNK_STORE_FILE)
+    def load_text_model(self):
+        if self._text_model is None:
+            with self._model_lock:
+                if self._text_model is None:
+                    readiness.set_state("text_embedder", "loading")
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                        model = SentenceTransformer(TEXT_EMBED_MODEL)
+                        if EMBED_BACKEND == "onnx":
+                            from ..core.onnx_embedder import load_onnx_embedder
+                            model = load_onnx_embedder(model, TEXT_EMBED_MODEL) or model
+                        self._text_model = model
+                        self.model_bytes["text_embedder"] = _model_size(model)
+                    except Exception as e:
+                        readiness.set_state("text_embedder", "failed", e)
+                        raise
+                    readiness.set_state("text_embedder", "ready")
+                    logger.info("Loaded text embedder: %s (%s)", TEXT_EMBED_MODEL, type(self._text_model).__name__)
+        return self._text_model
 
-    def _load_faiss(self, path):
-        if os.path.exists(path):
-            try:
-                idx = faiss.read_index(path)
-                # load id map
-                id_map = {}
-                # we keep a simple list mapping: faiss index id -> store index
-                logger.info("Loaded persisted FAISS index from %s", path)
-                return idx, id_map
-            except Exception:
-                logger.exception("Failed to load faiss index %s", path)
-        # empty index will be created on first add (d dimension known at runtime)
-        return None, {}
+    def load_clip(self):
+        """Load CLIP on first image use; raises RuntimeError if it cannot be loaded."""
+        if self._clip is None and self._clip_error is None:
+            with self._model_lock:
+                if self._clip is None and self._clip_error is None:
+                    readiness.set_state("clip", "loading")
+                    try:
+                        from transformers import CLIPModel, CLIPProcessor
+                        self._clip = CLIPModel.from_pretrained(CLIP_MODEL)
+                        self._clip_processor = CLIPProcessor.from_pretrained(CLIP_MODEL)
+                        self.model_bytes["clip"] = _model_size(self._clip)
+                        readiness.set_state("clip", "ready")
+                        logger.info("Loaded CLIP vision model")
+                    except Exception as e:
+                        self._clip_error = e
+                        readiness.set_state("clip", "failed", e)
+                        logger.warning("CLIP not loaded: %s", e)
+        if self._clip is None:
+            raise RuntimeError("CLIP model not available")
+        return self._clip, self._clip_processor
 
-    def _save_faiss(self, index, path):
+    def _load_state(self, manifest=None):
+        """Load the current generation (or the pre-manifest files) into memory."""
+        manifest = manifest or index_store.read_manifest()
         try:
-            faiss.write_index(index, path)
-            logger.info("Saved FAISS index to %s", path)
+            if manifest:
+                store, tombstones, text_index, image_index = index_store.load_generation(manifest)
+            else:
+                store, tombstones, text_index, image_index = index_store.load_legacy()
         except Exception:
-            logger.exception("Failed to save FAISS index to %s", path)
+            logger.exception("Failed loading index, starting empty")
+            store, tombstones, text_index, image_index = [], set(), None, None
+        self.generation = manifest["generation"] if manifest else 0
+        # In-memory chunk store: list of dicts {id, source, text, meta}; id == position
+        self.chunk_store = store
+        # ids of deleted records; skipped by searches until offline compaction drops them
+        self.tombstones = tombstones
+        self.text_index = text_index
+        self.image_index = image_index
+        # faiss position -> chunk_store id; vectors are added in store order, so the
+        # maps can be rebuilt from the store (text and image records interleave)
+        self.text_id_map = [c["id"] for c in self.chunk_store if not c.get("is_image")]
+        self.image_id_map = [c["id"] for c in self.chunk_store if c.get("is_image")]
+        # what the generation on disk holds; commits after it are replayed on hot reload,
+        # and checkpoints copy only the vectors added after it
+        self._base_records = len(store)
+        self._base_tombstones = set(tombstones)
+        self._base_vectors = {
+            "text_index": text_index.ntotal if text_index is not None else 0,
+            "image_index": image_index.ntotal if image_index is not None else 0,
+        }
+        # BM25 for sparse search
+        self.bm25 = None
+        self._build_bm25()
+        logger.info("Loaded index generation %d: %d records, %d tombstones", self.generation, len(store), len(tombstones))
 
     def _build_bm25(self):
         texts = [c.get("text", "") for c in self.chunk_store]
@@ -110,112 +173,364 @@ class EmbeddingManager:
     def embed_texts(self, texts):
         # caching by tuple of texts
         key = ("txt", tuple(texts))
-        if key in self.emb_cache:
-            return self.emb_cache[key]
-        emb = self._text_model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
-        self.emb_cache[key] = emb
+        with self._emb_cache_lock:
+            emb = self.emb_cache.get(key)
+        if emb is not None:
+            record_cache("embedding", True)
+            return emb
+        record_cache("embedding", False)
+        with timed("embedding"):
+            if self.batcher is not None and len(texts) < EMBED_MAX_BATCH:
+                emb = self.batcher.submit(texts).result(timeout=EMBED_TIMEOUT)
+            elif ENCODE_PROCESSES > 1 and len(texts) >= ENCODE_SHARDED_MIN_TEXTS:
+                emb = self._encode_sharded(texts)
+            else:
+                emb = self._encode(texts)
+        with self._emb_cache_lock:
+            self.emb_cache[key] = emb
         return emb
 
+    def clear_embedding_cache(self):
+        with self._emb_cache_lock:
+            self.emb_cache.clear()
+
+    def _encode(self, texts):
+        return self.load_text_model().encode(list(texts), convert_to_numpy=True, normalize_embeddings=True)
+
+    def _encode_sharded(self, texts):
+        from ..core.encoder_pool import encode_sharded
+        try:
+            return encode_sharded(texts)
+        except Exception:
+            logger.exception("Sharded encoding of %d texts failed, encoding in-process", len(texts))
+            return self._encode(texts)
+
     def embed_text(self, text):
         return self.embed_texts([text])[0]
 
     def embed_image_bytes(self, image_pil):
-        if not self._clip or not self._clip_processor:
-            raise RuntimeError("CLIP model not available")
-        inputs = self._clip_processor(images=image_pil, return_tensors="pt")
+        """CLIP image embeddings; accepts one PIL image or a list (one forward pass)."""
+        clip, processor = self.load_clip()
+        inputs = processor(images=image_pil, return_tensors="pt")
         with _lock:
-            out = self._clip.get_image_features(**inputs)
+            out = clip.get_image_features(**inputs)
         emb = out.detach().cpu().numpy()
         emb = emb / np.linalg.norm(emb, axis=1, keepdims=True)
         return emb
 
+    def embed_clip_text(self, text):
+        """CLIP text embedding, in the same space as the image index."""
+        clip, processor = self.load_clip()
+        inputs = processor(text=[text], return_tensors="pt", padding=True, truncation=True)
+        with _lock:
+            out = clip.get_text_features(**inputs)
+        emb = out.detach().cpu().numpy()
+        return emb / np.linalg.norm(emb, axis=1, keepdims=True)
+
     def add_documents(self, source_name, text, meta=None):
         """
         Chunk text and add to chunk_store and text FAISS index
         returns number of chunks added
         """
         # chunk the text
-        chunks = []
-        i = 0
-        L = len(text)
-        while i < L:
-            chunk = text[i:i + CHUNK_SIZE]
-            chunks.append(chunk)
-            i += CHUNK_SIZE - CHUNK_OVERLAP
+        chunks = chunk_text(text)
         logger.info("Split %s into %d chunks", source_name, len(chunks))
+        return self.add_chunks(source_name, chunks, [meta or {}] * len(chunks))
 
-        # embed all chunks
+    def add_chunks(self, source_name, chunks, metas=None):
+        """
+        Add pre-chunked text (with optional per-chunk meta) to chunk_store and text FAISS index.
+        The commit is in memory; the background checkpointer persists it.
+        returns number of chunks added
+        """
+        if not chunks:
+            return 0
         embeddings = self.embed_texts(chunks)
-        dim = embeddings.shape[1]
-        self._ensure_text_index(dim)
+        return self._commit_chunks(source_name, chunks, metas or [{}] * len(chunks), embeddings)
+
+    def add_chunk_batches(self, source_name, batches, meta=None):
+        """
+        Bulk ingest: commit an iterable of chunk lists one batch at a time, rebuilding
+        BM25 once at the end instead of after every batch.
+        returns number of chunks added
+        """
+        added = 0
+        for chunks in batches:
+            if chunks:
+                embeddings = self.embed_texts(chunks)
+                added += self._commit_chunks(source_name, chunks, [meta or {}] * len(chunks), embeddings,
+                                             rebuild_bm25=False)
+        target = get_manager() if self._retired else self
+        with target._write_lock:
+            target._build_bm25()
+        return added
 
-        # add to faiss index and chunk_store
+    def _commit_chunks(self, source_name, chunks, metas, embeddings, rebuild_bm25=True):
+        with self._write_lock:
+            if self._retired:
+                return get_manager()._commit_chunks(source_name, chunks, metas, embeddings, rebuild_bm25)
+            added = self._append_text_records(source_name, chunks, metas, embeddings)
+            if rebuild_bm25:
+                self._build_bm25()
+            self._mark_dirty(added)
+        return added
+
+    def _append_text_records(self, source_name, chunks, metas, embeddings):
+        self._ensure_text_index(embeddings.shape[1])
+        added = 0
         for idx, chunk in enumerate(chunks):
             store_id = len(self.chunk_store)
-            rec = {"id": store_id, "source": source_name, "text": chunk, "meta": meta or {}}
-            self.chunk_store.append(rec)
+            rec = {"id": store_id, "source": source_name, "text": chunk, "meta": dict(metas[idx])}
             # add vector
             try:
                 self.text_index.add(np.expand_dims(embeddings[idx], axis=0))
             except Exception as e:
                 logger.exception("Failed to add vector: %s", e)
-        # persist
-        self._save_chunk_store()
-        self._save_faiss(self.text_index, FAISS_INDEX_FILE)
-        self._build_bm25()
-        return len(chunks)
+                continue
+            self.chunk_store.append(rec)
+            self.text_id_map.append(store_id)
+            added += 1
+        return added
 
     def add_image(self, source_name, pil_image, meta=None):
         emb = self.embed_image_bytes(pil_image)
-        dim = emb.shape[1] if emb.ndim > 1 else emb.shape[0]
-        self._ensure_image_index(dim)
-        try:
-            self.image_index.add(emb)
-            # store metadata as a chunk in chunk_store for retrieval linking
-            store_id = len(self.chunk_store)
-            rec = {"id": store_id, "source": source_name, "text": f"[IMAGE:{source_name}]", "meta": meta or {}, "is_image": True}
-            self.chunk_store.append(rec)
-            self._save_chunk_store()
-            self._save_faiss(self.image_index, IMAGE_INDEX_FILE)
-            self._build_bm25()
-            return 1
-        except Exception:
-            logger.exception("Failed to add image embedding")
+        return self.add_images([source_name], emb, metas=[meta])
+
+    def add_images(self, source_names, embeddings, ocr_texts=None, metas=None):
+        """
+        Add a batch of CLIP image embeddings (one row per image) plus optional OCR
+        text per image. OCR text is chunked into text records whose meta links to the
+        image record ("image_id"). Everything is committed at once.
+        returns number of images added
+        """
+        if len(source_names) == 0:
             return 0
+        metas = metas or [None] * len(source_names)
+        ocr_texts = ocr_texts or [""] * len(source_names)
+        # OCR text is chunked and embedded before taking the write lock
+        ocr_chunks = [chunk_text(t) if t and t.strip() else [] for t in ocr_texts]
+        flat = [c for chunks in ocr_chunks for c in chunks]
+        ocr_embeddings = self.embed_texts(flat) if flat else None
+        return self._commit_images(source_names, embeddings, ocr_chunks, ocr_embeddings, metas)
+
+    def _commit_images(self, source_names, embeddings, ocr_chunks, ocr_embeddings, metas):
+        with self._write_lock:
+            if self._retired:
+                return get_manager()._commit_images(source_names, embeddings, ocr_chunks, ocr_embeddings, metas)
+            self._ensure_image_index(embeddings.shape[1])
+            try:
+                self.image_index.add(embeddings)
+            except Exception:
+                logger.exception("Failed to add image embeddings")
+                return 0
+            added = 0
+            offset = 0
+            for name, chunks, meta in zip(source_names, ocr_chunks, metas):
+                # store metadata as a chunk in chunk_store for retrieval linking
+                store_id = len(self.chunk_store)
+                rec = {"id": store_id, "source": name, "text": f"[IMAGE:{name}]", "meta": meta or {}, "is_image": True}
+                self.chunk_store.append(rec)
+                self.image_id_map.append(store_id)
+                added += 1
+                if chunks:
+                    chunk_metas = [{**(meta or {}), "image_id": store_id, "ocr": True}] * len(chunks)
+                    added += self._append_text_records(name, chunks, chunk_metas, ocr_embeddings[offset:offset + len(chunks)])
+                    offset += len(chunks)
+            self._build_bm25()
+            self._mark_dirty(added)
+        return len(source_names)
+
+    def delete_source(self, source_name):
+        """Tombstone every record of a source; the space is reclaimed by offline compaction."""
+        with self._write_lock:
+            if self._retired:
+                return get_manager().delete_source(source_name)
+            ids = [c["id"] for c in self.chunk_store if c.get("source") == source_name and c["id"] not in self.tombstones]
+            self.tombstones.update(ids)
+            self._mark_dirty(len(ids))
+        logger.info("Tombstoned %d records of %s", len(ids), source_name)
+        return len(ids)
+
+    # ----------------------------------------------------------------
+    # Checkpointing and hot reload
+    # ----------------------------------------------------------------
+    def _mark_dirty(self, n):
+        self._dirty += n
+        if self._dirty >= CHECKPOINT_MAX_DIRTY:
+            _checkpoint_wakeup.set()
+
+    def checkpoint(self, force=False):
+        """Write a new generation if there are uncheckpointed commits (or force)."""
+        return checkpoint_cycle(force, manager=self)
+
+    def _checkpoint_locked(self, base_manifest, generation, force=False):
+        """
+        Write our state as `generation`. Caller holds the IndexLock and has checked
+        that base_manifest (None: legacy files) is the generation we were built on.
+        Only vectors added since that generation are copied under the write lock;
+        the new index files are built outside it from the base files plus those rows.
+        """
+        with self._write_lock:
+            if self._retired or (not self._dirty and not force):
+                return None
+            records = list(self.chunk_store)
+            tombstones = set(self.tombstones)
+            deltas = {kind: self._new_vectors(kind) for kind in ("text_index", "image_index")}
+            dirty = self._dirty
+        with timed("checkpoint"):
+            indexes = {kind: self._checkpoint_index(base_manifest, kind, *deltas[kind]) for kind in deltas}
+            manifest = index_store.write_generation(
+                generation, records, indexes["text_index"], indexes["image_index"], tombstones)
+        with self._write_lock:
+            self.generation = generation
+            self._dirty -= dirty
+            self._base_records = len(records)
+            self._base_tombstones = tombstones
+            self._base_vectors = {kind: index.ntotal if index is not None else 0 for kind, index in indexes.items()}
+        return manifest
+
+    def _new_vectors(self, kind):
+        # (rows added since the base generation, live index ntotal); caller holds the write lock
+        index = getattr(self, kind)
+        if index is None:
+            return None, 0
+        base = self._base_vectors[kind]
+        rows = index.reconstruct_n(base, index.ntotal - base) if index.ntotal > base else None
+        return rows, index.ntotal
+
+    def _checkpoint_index(self, base_manifest, kind, rows, ntotal):
+        if not ntotal:
+            return None
+        index = index_store.load_index(base_manifest, kind)
+        on_disk = index.ntotal if index is not None else 0
+        if on_disk != self._base_vectors[kind]:
+            # the base files do not hold what we loaded; fall back to a full copy
+            logger.warning("Base %s on disk has %d vectors, expected %d; copying the full index",
+                           kind, on_disk, self._base_vectors[kind])
+            with self._write_lock:
+                index = faiss.clone_index(getattr(self, kind))
+            if index.ntotal > ntotal:
+                # rows committed after the snapshot belong to the next checkpoint
+                index.remove_ids(np.arange(ntotal, index.ntotal, dtype=np.int64))
+            return index
+        if index is None:
+            index = faiss.IndexFlatL2(rows.shape[1])
+        if rows is not None:
+            index.add(rows)
+        return index
+
+    def _reload(self, manifest):
+        """
+        Swap in a generation written by the offline compactor. Commits made since
+        our last checkpoint (the compaction's input) are replayed onto it, then the
+        new manager replaces this one; writers still holding this one are forwarded.
+        Caller holds the IndexLock.
+        """
+        global _manager
+        idmap = index_store.load_idmap(manifest)
+        if manifest.get("compacted_from") != self.generation or idmap is None or len(idmap) != self._base_records:
+            logger.error("Index generation %d on disk was not compacted from ours (%d); not reloading",
+                         manifest["generation"], self.generation)
+            return self
+        new = EmbeddingManager(shared=self, manifest=manifest)
+        with self._write_lock:
+            base = self._base_records
+            replayed = self._replay_into(new, base, idmap)
+            deleted = 0
+            for old_id in self.tombstones - self._base_tombstones:
+                if old_id < base and idmap[old_id] >= 0:
+                    new.tombstones.add(int(idmap[old_id]))
+                    deleted += 1
+            if replayed:
+                new._build_bm25()
+            new._dirty = replayed + deleted
+            self._retired = True
+            if _manager is self:
+                _manager = new
+        logger.info("Hot-reloaded compacted index generation %d (%d records replayed, %d deletions carried over)",
+                    new.generation, replayed, deleted)
+        return new
+
+    def _replay_into(self, new, base, idmap):
+        remap = {}
+        text_pos = bisect.bisect_left(self.text_id_map, base)
+        image_pos = bisect.bisect_left(self.image_id_map, base)
+        text_vecs = self.text_index.reconstruct_n(text_pos, len(self.text_id_map) - text_pos) \
+            if text_pos < len(self.text_id_map) else None
+        image_vecs = self.image_index.reconstruct_n(image_pos, len(self.image_id_map) - image_pos) \
+            if image_pos < len(self.image_id_map) else None
+        ti = ii = 0
+        for rec in self.chunk_store[base:]:
+            if rec.get("is_image"):
+                vec, ii = image_vecs[ii], ii + 1
+            else:
+                vec, ti = text_vecs[ti], ti + 1
+            if rec["id"] in self.tombstones:
+                continue
+            meta = dict(rec.get("meta") or {})
+            if "image_id" in meta:
+                old = meta["image_id"]
+                mapped = remap.get(old, -1) if old >= base else int(idmap[old])
+                if mapped < 0:
+                    meta.pop("image_id")
+                else:
+                    meta["image_id"] = mapped
+            new_id = len(new.chunk_store)
+            if rec.get("is_image"):
+                new._ensure_image_index(vec.shape[0])
+                new.image_index.add(vec.reshape(1, -1))
+                new.image_id_map.append(new_id)
+            else:
+                new._ensure_text_index(vec.shape[0])
+                new.text_index.add(vec.reshape(1, -1))
+                new.text_id_map.append(new_id)
+            new.chunk_store.append({**rec, "id": new_id, "meta": meta})
+            remap[rec["id"]] = new_id
+        return len(remap)
+
+    def chunks_for_source(self, source_name):
+        """Text chunks of a source in insertion (document) order."""
+        return [c for c in self.chunk_store
+                if c.get("source") == source_name and not c.get("is_image") and c["id"] not in self.tombstones]
+
+    def _search_k(self, index, k):
+        # over-fetch by the number of tombstones so k live hits survive filtering
+        return min(index.ntotal, k + len(self.tombstones))
 
     def search_dense(self, query, k=5):
         qv = self.embed_text(query).reshape(1, -1)
         if self.text_index is None or self.text_index.ntotal == 0:
             return []
-        D, I = self.text_index.search(qv, k)
-        results = []
-        for score, idx in zip(D[0], I[0]):
-            if idx < len(self.chunk_store):
-                results.append({"score": float(score), "chunk": self.chunk_store[idx]})
-        return results
+        with timed("faiss_search"):
+            D, I = self.text_index.search(qv, self._search_k(self.text_index, k))
+        return self._map_hits(D[0], I[0], self.text_id_map)[:k]
 
     def search_image_by_text(self, query, k=5):
-        # embed query and search image index (cross-modal search)
-        qv = self.embed_text(query).reshape(1, -1)
+        # embed query with CLIP's text tower and search image index (cross-modal search)
         if self.image_index is None or self.image_index.ntotal == 0:
             return []
-        D, I = self.image_index.search(qv, k)
+        qv = self.embed_clip_text(query)
+        D, I = self.image_index.search(qv, self._search_k(self.image_index, k))
+        return self._map_hits(D[0], I[0], self.image_id_map)[:k]
+
+    def _map_hits(self, scores, positions, id_map):
         results = []
-        for score, idx in zip(D[0], I[0]):
-            if idx < len(self.chunk_store):
-                results.append({"score": float(score), "chunk": self.chunk_store[idx]})
+        for score, pos in zip(scores, positions):
+            if 0 <= pos < len(id_map) and id_map[pos] < len(self.chunk_store) and id_map[pos] not in self.tombstones:
+                results.append({"score": float(score), "chunk": self.chunk_store[id_map[pos]]})
         return results
 
     def search_sparse(self, query, k=5):
         if not self.bm25:
             return []
-        scores = self.bm25.get_scores(query.split())
-        top_idx = np.argsort(scores)[::-1][:k]
+        with timed("bm25"):
+            scores = self.bm25.get_scores(query.split())
+            top_idx = np.argsort(scores)[::-1][:k + len(self.tombstones)]
         results = []
         for idx in top_idx:
-            if idx < len(self.chunk_store):
+            if idx < len(self.chunk_store) and idx not in self.tombstones:
                 results.append({"score": float(scores[idx]), "chunk": self.chunk_store[idx]})
-        return results
+        return results[:k]
 
     def hybrid_search(self, query, k=5, alpha=0.6):
         """
@@ -224,6 +539,10 @@ class EmbeddingManager:
         """
         dense = self.search_dense(query, k=k * 2)
         sparse = self.search_sparse(query, k=k * 2)
+        with timed("fusion"):
+            return self._fuse(dense, sparse, k, alpha)
+
+    def _fuse(self, dense, sparse, k, alpha):
         fused = {}
         # normalize dense scores (faiss L2 distances), convert to pseudo-similarity
         if dense:
@@ -255,10 +574,113 @@ class EmbeddingManager:
                 results.append(rec)
         return results
 
+def _model_size(model):
+    """Approximate resident size of a loaded model (torch parameters/buffers or ONNX file)."""
+    path = getattr(model, "path", None)
+    if path and os.path.exists(path):
+        return os.path.getsize(path)
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return 0
+
 # Singleton manager
 _manager = None
+_manager_lock = Lock()
 def get_manager():
     global _manager
     if _manager is None:
-        _manager = EmbeddingManager()
+        with _manager_lock:
+            if _manager is None:
+                readiness.set_state("index", "loading")
+                _manager = EmbeddingManager()
     return _manager
+
+
+def manager_stats():
+    """Index and model sizes for metrics; None until the manager has been created."""
+    manager = _manager
+    if manager is None:
+        return None
+    return {
+        "text_vectors": manager.text_index.ntotal if manager.text_index is not None else 0,
+        "image_vectors": manager.image_index.ntotal if manager.image_index is not None else 0,
+        "chunks": len(manager.chunk_store),
+        "batcher_queued": manager.batcher.stats()["queued"] if manager.batcher is not None else 0,
+        "model_bytes": dict(manager.model_bytes),
+        "generation": manager.generation,
+        "tombstones": len(manager.tombstones),
+        "dirty_records": manager._dirty,
+    }
+
+# --------------------------------------------------------------------
+# Background checkpointer
+# --------------------------------------------------------------------
+_checkpoint_wakeup = Event()
+_checkpointer = None
+_checkpointer_stop = False
+
+def checkpoint_cycle(force=False, manager=None):
+    """Hot-reload a newer compacted generation if there is one, then checkpoint pending commits."""
+    manager = manager or _manager
+    if manager is None:
+        return None
+    with index_store.IndexLock():
+        manifest = index_store.read_manifest()
+        on_disk = manifest["generation"] if manifest else 0
+        if on_disk > manager.generation:
+            manager = manager._reload(manifest)
+        if on_disk > manager.generation:
+            # another writer published a generation we could not take over; writing
+            # ours on top would overwrite its files and lose its commits
+            logger.error("Index generation %d on disk is ahead of ours (%d) and was not reloaded; "
+                         "refusing to checkpoint %d pending records", on_disk, manager.generation, manager._dirty)
+            return None
+        return manager._checkpoint_locked(manifest, max(on_disk, manager.generation) + 1, force)
+
+def _checkpoint_loop():
+    while not _checkpointer_stop:
+        # wakes every CHECKPOINT_INTERVAL_SECONDS, or early once CHECKPOINT_MAX_DIRTY records are pending
+        _checkpoint_wakeup.wait(CHECKPOINT_INTERVAL_SECONDS)
+        _checkpoint_wakeup.clear()
+        if _checkpointer_stop:
+            break
+        try:
+            checkpoint_cycle()
+        except Exception:
+            logger.exception("Index checkpoint failed")
+
+def start_checkpointer():
+    global _checkpointer, _checkpointer_stop
+    if _checkpointer is None:
+        _checkpointer_stop = False
+        _checkpointer = Thread(target=_checkpoint_loop, name="index-checkpointer", daemon=True)
+        _checkpointer.start()
+
+def stop_checkpointer(timeout=30):
+    """Stop the checkpointer and write a final checkpoint."""
+    global _checkpointer, _checkpointer_stop
+    _checkpointer_stop = True
+    _checkpoint_wakeup.set()
+    if _checkpointer is not None:
+        _checkpointer.join(timeout)
+        _checkpointer = None
+    try:
+        checkpoint_cycle()
+    except Exception:
+        logger.exception("Final index checkpoint failed")
+
+def _warm_up(load_clip):
+    try:
+        manager = get_manager()
+        manager.load_text_model()
+        manager.embed_texts(["warm-up"])
+        if load_clip:
+            manager.load_clip()
+    except Exception:
+        logger.exception("Model warm-up failed")
+
+def start_warmup(load_clip=WARMUP_CLIP):
+    """Load the index and text embedder (and CLIP if asked) in a background thread."""
+    Thread(target=_warm_up, args=(load_clip,), name="model-warmup", daemon=True).start()
@@ -0,0 +1,75 @@
+"""
+Multi-process sharded text encoding for large ingests.
+A single encode() call is capped by PyTorch intra-op scaling, so big embedding
+jobs are split into ENCODE_SHARD_SIZE shards and spread over ENCODE_PROCESSES
+spawned workers, each holding its own model copy with
+ENCODE_THREADS_PER_PROCESS threads. Shards are reassembled in input order.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+import numpy as np
+from .config import (
+    TEXT_EMBED_MODEL, EMBED_BACKEND, ENCODE_PROCESSES, ENCODE_THREADS_PER_PROCESS, ENCODE_SHARD_SIZE,
+)
+from .logger import logger
+
+_worker_model = None
+
+
+def _init_encoder_worker(model_name, backend, threads):
+    global _worker_model
+    import torch
+    torch.set_num_threads(threads)
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    if backend == "onnx":
+        from .onnx_embedder import load_onnx_embedder
+        model = load_onnx_embedder(model, model_name, threads=threads) or model
+    _worker_model = model
+
+
+def _encode_shard(texts):
+    return _worker_model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+
+_pool = None
+_pool_lock = Lock()
+
+
+def get_encoder_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that already initialized torch threads can deadlock
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, ENCODE_PROCESSES),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_encoder_worker,
+                initargs=(TEXT_EMBED_MODEL, EMBED_BACKEND, ENCODE_THREADS_PER_PROCESS),
+            )
+            logger.info("Started encoder pool: %d processes x %d threads", ENCODE_PROCESSES, ENCODE_THREADS_PER_PROCESS)
+    return _pool
+
+
+def encode_sharded(texts, shard_size=ENCODE_SHARD_SIZE):
+    """Encode texts across the encoder pool; returns embeddings in input order."""
+    texts = list(texts)
+    shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+    pool = get_encoder_pool()
+    try:
+        results = list(pool.map(_encode_shard, shards))
+    except BrokenProcessPool:
+        shutdown_encoder_pool()
+        raise
+    logger.info("Encoded %d texts in %d shards across the encoder pool", len(texts), len(shards))
+    return np.vstack(results)
+
+
+def shutdown_encoder_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
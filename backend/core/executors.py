@@ -0,0 +1,152 @@
+"""
+Per-workload executor pools for CPU-bound work called from async routes.
+Whisper, OCR, file extraction and embedding each get their own pool (thread or
+process, see EXECUTOR_POOLS in config) so one slow workload cannot starve the
+event loop or the others. Each pool admits at most workers + max_queue jobs;
+beyond that PoolBusyError is raised and routes answer 429. Bulk jobs use
+run_in_pool_when_free, which waits for queue space instead.
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from threading import Lock
+from .config import EXECUTOR_POOLS, POOL_RETRY_AFTER
+from .logger import logger
+
+_WAIT_POLL_SECONDS = 0.05
+
+
+class PoolBusyError(Exception):
+    def __init__(self, message, retry_after=POOL_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _timed_call(fn, args, kwargs):
+    # runs in the worker (thread or process); wall-clock so it is comparable across processes
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time() - started
+
+
+class WorkloadPool:
+    def __init__(self, name, kind="thread", workers=1, max_queue=16):
+        self.name = name
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        if kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"pool-{name}")
+        self._lock = Lock()
+        self._inflight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._run_total = 0.0
+        self._run_max = 0.0
+        self._wait_total = 0.0
+
+    def _admit(self):
+        with self._lock:
+            if self._inflight >= self.workers + self.max_queue:
+                return False
+            self._inflight += 1
+            return True
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit fn; returns a concurrent Future of (result, started, run_seconds)."""
+        if not self._admit():
+            with self._lock:
+                self._rejected += 1
+                logger.warning("Pool %s full (%d in flight), rejecting job", self.name, self._inflight)
+            raise PoolBusyError(f"{self.name} workers are busy, retry later.")
+        return self._submit_admitted(fn, args, kwargs)
+
+    def _submit_admitted(self, fn, args, kwargs):
+        submitted = time.time()
+        try:
+            fut = self._executor.submit(_timed_call, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._inflight -= 1
+            raise
+        fut.add_done_callback(lambda f: self._record(f, submitted))
+        return fut
+
+    def _record(self, fut, submitted):
+        with self._lock:
+            self._inflight -= 1
+            if fut.cancelled() or fut.exception() is not None:
+                self._failed += 1
+                return
+            _, started, run_s = fut.result()
+            self._completed += 1
+            self._run_total += run_s
+            self._run_max = max(self._run_max, run_s)
+            self._wait_total += max(0.0, started - submitted)
+
+    async def run(self, fn, *args, **kwargs):
+        result, _, _ = await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+        return result
+
+    async def run_when_free(self, fn, *args, **kwargs):
+        """Like run, but waits for queue space instead of raising PoolBusyError."""
+        while not self._admit():
+            await asyncio.sleep(_WAIT_POLL_SECONDS)
+        result, _, _ = await asyncio.wrap_future(self._submit_admitted(fn, args, kwargs))
+        return result
+
+    def stats(self):
+        with self._lock:
+            done = self._completed or 1
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": min(self._inflight, self.workers),
+                "queue_depth": max(0, self._inflight - self.workers),
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_run_s": self._run_total / done,
+                "max_run_s": self._run_max,
+                "avg_wait_s": self._wait_total / done,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pools = {}
+_pools_lock = Lock()
+
+def get_pool(name):
+    with _pools_lock:
+        if name not in _pools:
+            conf = EXECUTOR_POOLS.get(name, {})
+            _pools[name] = WorkloadPool(name, conf.get("kind", "thread"), conf.get("workers", 1), conf.get("max_queue", 16))
+        return _pools[name]
+
+async def run_in_pool(name, fn, *args, **kwargs):
+    """Run a CPU-bound callable on the named workload pool and await its result."""
+    return await get_pool(name).run(fn, *args, **kwargs)
+
+async def run_in_pool_when_free(name, fn, *args, **kwargs):
+    """run_in_pool for bulk jobs: backpressure (wait for a queue slot) instead of 429."""
+    return await get_pool(name).run_when_free(fn, *args, **kwargs)
+
+def pool_stats():
+    for name in EXECUTOR_POOLS:
+        get_pool(name)
+    with _pools_lock:
+        pools = dict(_pools)
+    return {name: pool.stats() for name, pool in pools.items()}
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
@@ -0,0 +1,69 @@
+"""
+Ephemeral per-file index cache for file chat.
+Entries are keyed by the sha256 of the uploaded bytes and hold the extracted
+text, its chunks and their (normalized) embeddings. Nothing is added to the
+knowledge base; entries live in an LRU bounded by FILE_CACHE_MAX_MB.
+"""
+import hashlib
+from threading import Lock
+import numpy as np
+from cachetools import LRUCache
+from .config import FILE_CACHE_MAX_MB
+from .embedding_manager import get_manager, chunk_text
+from .logger import logger
+from .metrics import record_cache
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _entry_size(entry):
+    # approximate footprint: characters of text + chunks, plus the raw vectors
+    return len(entry["text"]) + sum(len(c) for c in entry["chunks"]) + entry["embeddings"].nbytes
+
+
+_cache = LRUCache(maxsize=FILE_CACHE_MAX_MB * 1024 * 1024, getsizeof=_entry_size)
+_cache_lock = Lock()
+
+
+def get_entry(file_hash: str):
+    with _cache_lock:
+        entry = _cache.get(file_hash)
+    record_cache("file", entry is not None)
+    return entry
+
+
+def build_entry(file_hash: str, text: str, name: str = None):
+    """
+    Chunk and embed extracted text and cache it under file_hash.
+    Returns the entry (also when it was too large to be cached).
+    """
+    chunks = chunk_text(text)
+    embeddings = get_manager().embed_texts(chunks)
+    entry = {"hash": file_hash, "name": name, "text": text, "chunks": chunks, "embeddings": embeddings}
+    with _cache_lock:
+        try:
+            _cache[file_hash] = entry
+        except ValueError:
+            logger.warning("File %s (%s) exceeds file cache size, not cached", name, file_hash)
+    logger.info("Indexed file %s (%s) into ephemeral cache: %d chunks", name, file_hash, len(chunks))
+    return entry
+
+
+def top_chunks(entry, question: str, k: int = 3):
+    """
+    Return the k chunks of a cached file most similar to the question, in document order.
+    """
+    chunks = entry["chunks"]
+    if len(chunks) <= k:
+        return list(chunks)
+    qv = get_manager().embed_text(question)
+    scores = entry["embeddings"] @ qv
+    best = np.argsort(scores)[::-1][:k]
+    return [chunks[i] for i in sorted(best)]
+
+
+def cache_stats():
+    with _cache_lock:
+        return {"entries": len(_cache), "bytes": _cache.currsize, "max_bytes": _cache.maxsize}
@@ -0,0 +1,108 @@
+"""
+Offline index compaction.
+Drops tombstoned records, renumbers the survivors and rebuilds both FAISS
+indexes from the kept vectors, then publishes the result as the next index
+generation. A running server picks it up on its next checkpoint cycle and
+replays whatever it committed in the meantime, so no restart is needed.
+
+    python -m backend.core.index_compactor [--dry-run]
+"""
+import argparse
+import json
+import time
+import numpy as np
+import faiss
+from . import index_store
+from .logger import logger
+
+_BLOCK = 65536
+
+
+def _rebuild(index, positions):
+    """Copy of `index` holding only the vectors at `positions` (ascending), in order."""
+    if index is None:
+        return None
+    rebuilt = faiss.clone_index(index)
+    rebuilt.reset()
+    positions = np.asarray(positions, dtype=np.int64)
+    # read back contiguous blocks; only the kept rows are re-added
+    for start in range(0, index.ntotal, _BLOCK):
+        n = min(_BLOCK, index.ntotal - start)
+        keep = positions[(positions >= start) & (positions < start + n)]
+        if len(keep):
+            block = index.reconstruct_n(start, n)
+            rebuilt.add(block[keep - start])
+    return rebuilt
+
+
+def compact(dry_run=False):
+    """Compact the current generation; returns a summary dict."""
+    started = time.perf_counter()
+    with index_store.IndexLock():
+        manifest = index_store.read_manifest()
+        if manifest:
+            records, tombstones, text_index, image_index = index_store.load_generation(manifest)
+            generation = manifest["generation"]
+        else:
+            records, tombstones, text_index, image_index = index_store.load_legacy()
+            generation = 0
+        summary = {"generation": generation, "records": len(records), "tombstones": len(tombstones)}
+        if not tombstones:
+            return {**summary, "compacted": False, "reason": "no tombstones"}
+
+        # old id -> new id (-1 for dropped records)
+        idmap = np.full(len(records), -1, dtype=np.int64)
+        kept, text_keep, image_keep = [], [], []
+        text_pos = image_pos = 0
+        for rec in records:
+            # faiss positions follow store order within each index
+            live = rec["id"] not in tombstones
+            if live:
+                idmap[rec["id"]] = len(kept)
+                kept.append(rec)
+            if rec.get("is_image"):
+                if live:
+                    image_keep.append(image_pos)
+                image_pos += 1
+            else:
+                if live:
+                    text_keep.append(text_pos)
+                text_pos += 1
+
+        compacted = []
+        for rec in kept:
+            meta = dict(rec.get("meta") or {})
+            if "image_id" in meta:
+                # OCR chunks whose image was removed keep their text but lose the link
+                new_image_id = int(idmap[meta["image_id"]])
+                if new_image_id < 0:
+                    meta.pop("image_id")
+                else:
+                    meta["image_id"] = new_image_id
+            compacted.append({**rec, "id": int(idmap[rec["id"]]), "meta": meta})
+
+        summary.update(kept=len(compacted), dropped=len(records) - len(compacted))
+        if dry_run:
+            return {**summary, "compacted": False, "reason": "dry run"}
+
+        new_text = _rebuild(text_index, text_keep)
+        new_image = _rebuild(image_index, image_keep)
+        new_manifest = index_store.write_generation(
+            generation + 1, compacted, new_text, new_image, set(), idmap=idmap,
+            extra={"compacted_from": generation},
+        )
+    summary.update(compacted=True, new_generation=new_manifest["generation"], seconds=time.perf_counter() - started)
+    logger.info("Compacted index generation %d -> %d (%d of %d records kept)",
+                generation, new_manifest["generation"], len(compacted), len(records))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be dropped without writing")
+    args = parser.parse_args(argv)
+    print(json.dumps(compact(dry_run=args.dry_run), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+On-disk generations of the knowledge-base index.
+A generation is a chunk store pickle ({"records", "tombstones"}), the text and
+image FAISS indexes and, for compacted generations, an old->new id map. Every
+file is written to a temp name and os.replace'd into place; manifest.json,
+replaced last, names the files of the current generation. A crash at any
+point leaves the previous manifest and its files intact. Writers (the
+server's checkpointer and the offline compactor) serialize on a lock file.
+"""
+import json
+import os
+import pickle
+import re
+import time
+import faiss
+import numpy as np
+from .config import (
+    EMBEDDINGS_DIR, INDEX_MANIFEST_FILE, FAISS_INDEX_FILE, IMAGE_INDEX_FILE, CHUNK_STORE_FILE,
+    CHECKPOINT_KEEP_GENERATIONS, INDEX_LOCK_STALE_SECONDS,
+)
+from .logger import logger
+
+LOCK_FILE = os.path.join(EMBEDDINGS_DIR, ".index.lock")
+_GEN_FILE = re.compile(r"^(chunk_store|embed_index|image_index|idmap)\.(\d+)\.(pkl|faiss|npy)$")
+
+
+class IndexLock:
+    """Cross-process writer lock (O_EXCL lock file; stale locks are broken after INDEX_LOCK_STALE_SECONDS)."""
+
+    def __init__(self, timeout=None, poll=0.1):
+        self.timeout = timeout
+        self.poll = poll
+        self._fd = None
+
+    def __enter__(self):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            try:
+                self._fd = os.open(LOCK_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(self._fd, str(os.getpid()).encode())
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(LOCK_FILE) > INDEX_LOCK_STALE_SECONDS:
+                        logger.warning("Breaking stale index lock %s", LOCK_FILE)
+                        os.remove(LOCK_FILE)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError("Index lock is held by another writer")
+                time.sleep(self.poll)
+
+    def __exit__(self, *exc):
+        os.close(self._fd)
+        self._fd = None
+        try:
+            os.remove(LOCK_FILE)
+        except FileNotFoundError:
+            pass
+
+
+def _path(name):
+    return os.path.join(EMBEDDINGS_DIR, name)
+
+
+def _fsync_dir():
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(EMBEDDINGS_DIR, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _replace_synced(tmp, path):
+    with open(tmp, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _atomic_write_bytes(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    _replace_synced(tmp, path)
+
+
+def _atomic_write_index(path, index):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    faiss.write_index(index, tmp)
+    _replace_synced(tmp, path)
+
+
+def read_manifest():
+    if not os.path.exists(INDEX_MANIFEST_FILE):
+        return None
+    try:
+        with open(INDEX_MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        logger.exception("Failed to read index manifest %s", INDEX_MANIFEST_FILE)
+        return None
+
+
+def write_generation(generation, records, text_index, image_index, tombstones, idmap=None, extra=None):
+    """Write all files of a generation, then publish it by replacing the manifest. Caller holds IndexLock."""
+    files = {"chunk_store": f"chunk_store.{generation}.pkl", "text_index": None, "image_index": None, "idmap": None}
+    _atomic_write_bytes(_path(files["chunk_store"]), pickle.dumps(
+        {"records": records, "tombstones": sorted(tombstones)}, protocol=pickle.HIGHEST_PROTOCOL))
+    if text_index is not None:
+        files["text_index"] = f"embed_index.{generation}.faiss"
+        _atomic_write_index(_path(files["text_index"]), text_index)
+    if image_index is not None:
+        files["image_index"] = f"image_index.{generation}.faiss"
+        _atomic_write_index(_path(files["image_index"]), image_index)
+    if idmap is not None:
+        files["idmap"] = f"idmap.{generation}.npy"
+        tmp = _path(files["idmap"]) + f".{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, idmap)
+        _replace_synced(tmp, _path(files["idmap"]))
+    manifest = {
+        "generation": generation,
+        "files": files,
+        "records": len(records),
+        "tombstones": len(tombstones),
+        "created_at": time.time(),
+        **(extra or {}),
+    }
+    _atomic_write_bytes(INDEX_MANIFEST_FILE, json.dumps(manifest, indent=2).encode("utf-8"))
+    _fsync_dir()
+    cleanup_generations(generation)
+    logger.info("Checkpointed index generation %d (%d records, %d tombstones)", generation, len(records), len(tombstones))
+    return manifest
+
+
+def load_generation(manifest):
+    """Return (records, tombstones, text_index, image_index) for a manifest."""
+    files = manifest["files"]
+    with open(_path(files["chunk_store"]), "rb") as f:
+        data = pickle.load(f)
+    text_index = faiss.read_index(_path(files["text_index"])) if files.get("text_index") else None
+    image_index = faiss.read_index(_path(files["image_index"])) if files.get("image_index") else None
+    return data["records"], set(data["tombstones"]), text_index, image_index
+
+
+def load_index(manifest, kind):
+    """One FAISS index ("text_index" or "image_index") of a generation, or of the legacy files when manifest is None."""
+    if manifest is None:
+        path = FAISS_INDEX_FILE if kind == "text_index" else IMAGE_INDEX_FILE
+        return faiss.read_index(path) if os.path.exists(path) else None
+    name = manifest["files"].get(kind)
+    return faiss.read_index(_path(name)) if name else None
+
+
+def load_idmap(manifest):
+    name = manifest["files"].get("idmap")
+    return np.load(_path(name)) if name else None
+
+
+def load_legacy():
+    """Pre-manifest layout: chunk_store.pkl (a plain list) and unversioned FAISS files."""
+    records, text_index, image_index = [], None, None
+    if os.path.exists(CHUNK_STORE_FILE):
+        with open(CHUNK_STORE_FILE, "rb") as f:
+            records = pickle.load(f)
+    if os.path.exists(FAISS_INDEX_FILE):
+        text_index = faiss.read_index(FAISS_INDEX_FILE)
+    if os.path.exists(IMAGE_INDEX_FILE):
+        image_index = faiss.read_index(IMAGE_INDEX_FILE)
+    return records, set(), text_index, image_index
+
+
+def cleanup_generations(current, keep=CHECKPOINT_KEEP_GENERATIONS):
+    """Delete generation files older than the last `keep` generations."""
+    oldest = current - max(1, keep) + 1
+    for name in os.listdir(EMBEDDINGS_DIR):
+        m = _GEN_FILE.match(name)
+        if m and int(m.group(2)) < oldest:
+            try:
+                os.remove(_path(name))
+            except OSError:
+                logger.warning("Could not remove old index file %s", name)
@@ -0,0 +1,92 @@
+"""
+Queue-backed micro-batcher for non-streaming inference.
+Requests are collected for up to INFER_BATCH_WINDOW_MS (or INFER_MAX_BATCH items)
+and then dispatched concurrently to Ollama by INFER_PARALLELISM workers, all at
+background priority through the LLM gate. Each caller gets a Future for its result.
+"""
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Thread, Lock
+from .config import INFER_BATCH_WINDOW_MS, INFER_MAX_BATCH, INFER_PARALLELISM, INFER_MAX_PENDING, INFER_TIMEOUT
+from .llm_gate import LLMBusyError, PRIORITY_BACKGROUND
+from .model_selector import select_model
+from .ollama_client import chat
+from .logger import logger
+
+
+class InferenceBatcher:
+    def __init__(self, window_ms=INFER_BATCH_WINDOW_MS, max_batch=INFER_MAX_BATCH,
+                 parallelism=INFER_PARALLELISM, max_pending=INFER_MAX_PENDING):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._queue = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="infer")
+        self._lock = Lock()
+        self._pending = 0
+        self._thread = None
+        self._batches = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._loop, name="infer-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, prompt, model=None, system=None):
+        """Queue one prompt; returns a Future resolving to the response text."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise LLMBusyError("Inference queue is full, retry later.")
+            self._pending += 1
+        self._ensure_started()
+        fut = Future()
+        self._queue.put((prompt, model, system, fut))
+        return fut
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._batches += 1
+            logger.debug("Dispatching inference batch of %d", len(batch))
+            for item in batch:
+                self._pool.submit(self._run, item)
+
+    def _run(self, item):
+        prompt, model, system, fut = item
+        try:
+            if not fut.set_running_or_notify_cancel():
+                return
+            messages = [{"role": "system", "content": system}] if system else []
+            messages.append({"role": "user", "content": prompt})
+            fut.set_result(chat(model or select_model("text"), messages, priority=PRIORITY_BACKGROUND, timeout=INFER_TIMEOUT,
+                                meta={"route": "infer"}))
+        except Exception as e:
+            fut.set_exception(e)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "queued": self._queue.qsize(), "batches": self._batches}
+
+
+_batcher = None
+_batcher_lock = Lock()
+def get_batcher():
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = InferenceBatcher()
+    return _batcher
@@ -0,0 +1,122 @@
+"""
+Admission control for Ollama calls.
+A single process-wide gate limits concurrent generations to LLM_MAX_CONCURRENCY.
+Callers that cannot get a slot wait in a bounded priority queue (lower value is
+served first); when the queue is full or the wait exceeds LLM_QUEUE_TIMEOUT an
+LLMBusyError is raised so routes can answer 429 with Retry-After immediately.
+"""
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from threading import Condition
+from .config import LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT, LLM_RETRY_AFTER
+from .logger import logger
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class LLMBusyError(Exception):
+    def __init__(self, message, retry_after=LLM_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMSlot:
+    """A held concurrency slot. release() is idempotent."""
+
+    def __init__(self, gate):
+        self._gate = gate
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._gate._release()
+
+
+class LLMGate:
+    def __init__(self, max_concurrency, max_queue, queue_timeout):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = Condition()
+        self._active = 0
+        self._waiters = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        # counters
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE, timeout=None):
+        timeout = self.queue_timeout if timeout is None else timeout
+        start = time.monotonic()
+        with self._cond:
+            if self._active < self.max_concurrency and not self._waiters:
+                return self._admit(start)
+            if len(self._waiters) >= self.max_queue:
+                self._rejected += 1
+                logger.warning("LLM queue full (%d waiting), rejecting request", len(self._waiters))
+                raise LLMBusyError("LLM queue is full, retry later.")
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while not (self._active < self.max_concurrency and self._waiters[0] == ticket):
+                    remaining = start + timeout - time.monotonic()
+                    if remaining <= 0:
+                        self._timed_out += 1
+                        raise LLMBusyError("Timed out waiting for an LLM slot, retry later.")
+                    self._cond.wait(remaining)
+                heapq.heappop(self._waiters)
+            except BaseException:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+            slot = self._admit(start)
+            # the next waiter may also fit if more than one slot is free
+            self._cond.notify_all()
+            return slot
+
+    def _admit(self, start):
+        waited = time.monotonic() - start
+        self._active += 1
+        self._admitted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        return LLMSlot(self)
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_INTERACTIVE, timeout=None):
+        s = self.acquire(priority, timeout)
+        try:
+            yield s
+        finally:
+            s.release()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queue_depth": len(self._waiters),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "avg_wait_s": self._wait_total / self._admitted if self._admitted else 0.0,
+                "max_wait_s": self._wait_max,
+            }
+
+
+gate = LLMGate(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT)
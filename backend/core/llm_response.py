@@ -0,0 +1,19 @@
+"""
+StreamingResponse that owns a ChatStream's LLM slot.
+Starlette skips background tasks when the client disconnects (ASGI spec >= 2.4
+raises ClientDisconnect), and a body generator that never started has no
+finally to run, so the slot is released around the whole response instead.
+"""
+from fastapi.responses import StreamingResponse
+
+
+class LLMStreamingResponse(StreamingResponse):
+    def __init__(self, content, stream, **kwargs):
+        super().__init__(content, **kwargs)
+        self.llm_stream = stream
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.llm_stream.close()
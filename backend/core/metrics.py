@@ -0,0 +1,130 @@
+"""
+Prometheus metrics, served by GET /api/metrics.
+ - rag_stage_seconds{stage}: upload, extraction, chunking, embedding,
+   faiss_search, bm25, fusion, checkpoint
+ - rag_llm_ttft_seconds / rag_llm_generation_seconds / rag_llm_tokens_per_second{model}
+ - rag_cache_requests_total{cache,result} and rag_cache_hit_ratio{cache}
+ - gauges read at scrape time: index sizes and generation, tombstones and
+   uncheckpointed records, executor and LLM queue depths, loaded model memory
+Metrics are per process; with several uvicorn workers scrape each one.
+"""
+import time
+from contextlib import contextmanager
+from threading import Lock
+from prometheus_client import Counter, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily
+from .logger import logger
+
+_STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram("rag_stage_seconds", "Time spent per pipeline stage", ["stage"], buckets=_STAGE_BUCKETS)
+LLM_TTFT = Histogram("rag_llm_ttft_seconds", "LLM time to first token (including queue wait)", ["model"],
+                     buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120))
+LLM_GENERATION = Histogram("rag_llm_generation_seconds", "LLM total generation time", ["model"],
+                           buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, 300))
+LLM_TOKENS_PER_SECOND = Histogram("rag_llm_tokens_per_second", "LLM decode throughput", ["model"],
+                                  buckets=(1, 2, 5, 10, 20, 30, 40, 60, 80, 120, 160, 320))
+CACHE_REQUESTS = Counter("rag_cache_requests", "Cache lookups", ["cache", "result"])
+
+_cache_counts = {}
+_cache_lock = Lock()
+
+
+@contextmanager
+def timed(stage):
+    """Time a block (or, as a decorator, a function) into rag_stage_seconds{stage}."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+    with _cache_lock:
+        hits, total = _cache_counts.get(cache, (0, 0))
+        _cache_counts[cache] = (hits + (1 if hit else 0), total + 1)
+
+
+def record_generation(model, ttft=None, total=None, tokens_per_s=None):
+    if ttft is not None:
+        LLM_TTFT.labels(model).observe(ttft)
+    if total is not None:
+        LLM_GENERATION.labels(model).observe(total)
+    if tokens_per_s:
+        LLM_TOKENS_PER_SECOND.labels(model).observe(tokens_per_s)
+
+
+def _gauge(name, doc, labels=(), samples=()):
+    g = GaugeMetricFamily(name, doc, labels=list(labels))
+    for label_values, value in samples:
+        g.add_metric(list(label_values), value)
+    return g
+
+
+class _StateCollector:
+    """Point-in-time gauges, read from the components' own stats at scrape time."""
+
+    def describe(self):
+        # without this the registry calls collect() at registration, i.e. at import
+        # time, which would import every component and build the executor pools
+        return []
+
+    def collect(self):
+        try:
+            yield from self._collect()
+        except Exception:
+            logger.exception("Collecting state metrics failed")
+
+    def _collect(self):
+        # imported lazily: these modules import this one
+        from .embedding_manager import manager_stats
+        from .executors import pool_stats
+        from .llm_gate import gate
+        from .audio_transcriber import whisper_pool
+        from .file_cache import cache_stats
+        from .ocr_extractor import ocr_cache_stats
+
+        with _cache_lock:
+            counts = dict(_cache_counts)
+        yield _gauge("rag_cache_hit_ratio", "Cache hit ratio since start", ["cache"],
+                     [((name,), hits / total) for name, (hits, total) in counts.items() if total])
+        caches = {"file": cache_stats(), "ocr": ocr_cache_stats()}
+        yield _gauge("rag_cache_entries", "Entries held per cache", ["cache"],
+                     [((name,), s["entries"]) for name, s in caches.items()])
+        yield _gauge("rag_cache_bytes", "Bytes held per size-bounded cache", ["cache"],
+                     [((name,), s["bytes"]) for name, s in caches.items() if "bytes" in s])
+
+        manager = manager_stats()
+        if manager is not None:
+            yield _gauge("rag_index_vectors", "Vectors in the FAISS indexes", ["index"],
+                         [(("text",), manager["text_vectors"]), (("image",), manager["image_vectors"])])
+            yield _gauge("rag_chunk_store_entries", "Records in the chunk store", samples=[((), manager["chunks"])])
+            yield _gauge("rag_index_generation", "Index generation loaded in memory", samples=[((), manager["generation"])])
+            yield _gauge("rag_index_tombstones", "Deleted records awaiting compaction", samples=[((), manager["tombstones"])])
+            yield _gauge("rag_index_dirty_records", "Records committed but not yet checkpointed",
+                         samples=[((), manager["dirty_records"])])
+            yield _gauge("rag_embedding_batcher_queued", "Embedding requests waiting for a batch",
+                         samples=[((), manager["batcher_queued"])])
+            yield _gauge("rag_model_memory_bytes", "Approximate memory of loaded models", ["model"],
+                         [((name,), size) for name, size in manager["model_bytes"].items()]
+                         + [(("whisper",), whisper_pool.stats()["bytes"])])
+
+        pools = pool_stats()
+        yield _gauge("rag_executor_queue_depth", "Jobs waiting per executor pool", ["pool"],
+                     [((name,), s["queue_depth"]) for name, s in pools.items()])
+        yield _gauge("rag_executor_running", "Jobs running per executor pool", ["pool"],
+                     [((name,), s["running"]) for name, s in pools.items()])
+
+        llm = gate.stats()
+        yield _gauge("rag_llm_active", "LLM calls holding a slot", samples=[((), llm["active"])])
+        yield _gauge("rag_llm_queue_depth", "LLM calls waiting for a slot", samples=[((), llm["queue_depth"])])
+
+
+REGISTRY.register(_StateCollector())
+
+
+def render():
+    """Return (body, content_type) for the metrics endpoint."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
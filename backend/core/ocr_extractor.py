@@ -1,21 +1,165 @@
+import hashlib
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
 from PIL import Image
 import pytesseract
+from cachetools import LRUCache
 from .logger import logger
-from .config import TESSERACT_CMD
+from .metrics import record_cache
+from .config import (
+    TESSERACT_CMD, OCR_TARGET_DPI, OCR_MAX_SIDE, OCR_GRAYSCALE, OCR_BINARIZE_THRESHOLD,
+    OCR_PROCESSES, OCR_CACHE_SIZE, PDF_OCR_DPI,
+)
 from io import BytesIO
 
 # set tesseract path if provided
 if TESSERACT_CMD:
     pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
 
+def preprocess_image(img, target_dpi=OCR_TARGET_DPI, grayscale=OCR_GRAYSCALE, threshold=OCR_BINARIZE_THRESHOLD):
+    """
+    Cheap preprocessing that makes Tesseract faster on large scans:
+    downscale to target_dpi (or OCR_MAX_SIDE when no DPI is recorded),
+    convert to grayscale and optionally binarize at a fixed threshold.
+    """
+    dpi = img.info.get("dpi", (0, 0))[0] or 0
+    if dpi and target_dpi and dpi > target_dpi:
+        scale = target_dpi / float(dpi)
+    else:
+        scale = min(1.0, OCR_MAX_SIDE / float(max(img.size)))
+    if scale < 1.0:
+        img = img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale))), Image.LANCZOS)
+    if grayscale or threshold:
+        img = img.convert("L")
+    if threshold:
+        img = img.point(lambda p: 255 if p > threshold else 0)
+    return img
+
+def _ocr_bytes(image_bytes):
+    # module-level so it can run in the OCR process pool
+    img = Image.open(BytesIO(image_bytes))
+    return pytesseract.image_to_string(preprocess_image(img))
+
+# results cached by image hash (preprocessing settings are process-wide)
+_ocr_cache = LRUCache(OCR_CACHE_SIZE)
+_ocr_cache_lock = Lock()
+_ocr_pool = None
+
+def _image_key(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+def get_ocr_pool():
+    global _ocr_pool
+    with _ocr_cache_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ProcessPoolExecutor(max_workers=max(1, OCR_PROCESSES), mp_context=multiprocessing.get_context("spawn"))
+    return _ocr_pool
+
 def extract_text_from_image_bytes(image_bytes) -> str:
     try:
-        if isinstance(image_bytes, (bytes, bytearray)):
-            img = Image.open(BytesIO(image_bytes))
-        else:
-            img = Image.open(image_bytes)
-        text = pytesseract.image_to_string(img)
+        if not isinstance(image_bytes, (bytes, bytearray)):
+            image_bytes = image_bytes.read()
+        key = _image_key(image_bytes)
+        with _ocr_cache_lock:
+            if key in _ocr_cache:
+                record_cache("ocr", True)
+                return _ocr_cache[key]
+        record_cache("ocr", False)
+        text = _ocr_bytes(image_bytes)
+        with _ocr_cache_lock:
+            _ocr_cache[key] = text
         return text
     except Exception as e:
         logger.exception("OCR extraction failed")
         return ""
+
+def ocr_pil_image(img, image_bytes):
+    """OCR an already decoded PIL image; cached by the hash of its source bytes."""
+    key = _image_key(image_bytes)
+    with _ocr_cache_lock:
+        if key in _ocr_cache:
+            record_cache("ocr", True)
+            return _ocr_cache[key]
+    record_cache("ocr", False)
+    try:
+        text = pytesseract.image_to_string(preprocess_image(img))
+    except Exception:
+        logger.exception("OCR extraction failed")
+        return ""
+    with _ocr_cache_lock:
+        _ocr_cache[key] = text
+    return text
+
+def ocr_images_batch(images):
+    """
+    OCR many images at multi-core throughput: cache hits are answered directly,
+    distinct misses are fanned out over the OCR process pool.
+    Returns texts in input order ("" for images that failed).
+    """
+    keys = [_image_key(b) for b in images]
+    results = [None] * len(images)
+    misses = {}
+    with _ocr_cache_lock:
+        for i, key in enumerate(keys):
+            if key in _ocr_cache:
+                results[i] = _ocr_cache[key]
+            elif key not in misses:
+                misses[key] = images[i]
+    logger.info("Batch OCR: %d images, %d cached, %d to process", len(images), len(images) - len(misses), len(misses))
+
+    if misses:
+        pool = get_ocr_pool()
+        futures = {key: pool.submit(_ocr_bytes, data) for key, data in misses.items()}
+        texts = {}
+        for key, fut in futures.items():
+            try:
+                texts[key] = fut.result()
+            except Exception:
+                logger.exception("Batch OCR failed for image %s", key)
+                texts[key] = None
+        with _ocr_cache_lock:
+            for key, text in texts.items():
+                if text is not None:
+                    _ocr_cache[key] = text
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                results[i] = texts.get(key) or ""
+    return results
+
+def _ocr_pdf_page(path, page_index, dpi):
+    # module-level so it can run in the OCR process pool; each worker opens the PDF itself
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(path)
+    try:
+        img = pdf[page_index].render(scale=dpi / 72.0).to_pil()
+    finally:
+        pdf.close()
+    img.info["dpi"] = (dpi, dpi)
+    return pytesseract.image_to_string(preprocess_image(img))
+
+def ocr_pdf_pages(path, page_indexes, dpi=PDF_OCR_DPI):
+    """
+    Rasterize and OCR the given PDF pages in parallel over the OCR process pool.
+    Returns {page_index: text}; pages that fail map to "".
+    """
+    if not page_indexes:
+        return {}
+    if importlib.util.find_spec("pypdfium2") is None:
+        logger.warning("pypdfium2 not installed, skipping OCR of %d scanned PDF pages", len(page_indexes))
+        return {}
+    pool = get_ocr_pool()
+    futures = {i: pool.submit(_ocr_pdf_page, path, i, dpi) for i in page_indexes}
+    texts = {}
+    for i, fut in futures.items():
+        try:
+            texts[i] = fut.result()
+        except Exception:
+            logger.exception("OCR failed for page %d of %s", i + 1, path)
+            texts[i] = ""
+    return texts
+
+def ocr_cache_stats():
+    with _ocr_cache_lock:
+        return {"entries": len(_ocr_cache), "max_entries": _ocr_cache.maxsize}
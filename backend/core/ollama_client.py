@@ -0,0 +1,149 @@
+"""
+Thin Ollama /api/chat client shared by the routes.
+Every call goes through the LLM admission gate (see llm_gate). Completed calls
+are recorded to metrics and queued to analytics (request id, route, session,
+model, TTFT, latency, token counts) from Ollama's final message.
+"""
+import json
+import time
+import uuid
+import requests
+from .config import OLLAMA_HOST, OLLAMA_PORT
+from .llm_gate import gate, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from .metrics import record_generation
+from . import analytics
+
+
+def chat_url():
+    return f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/api/chat"
+
+
+def parse_stream_line(raw):
+    """
+    Parse one line of an Ollama (or SSE-wrapped) stream.
+    Returns (token, obj) where obj is the decoded JSON or None; token is None for [DONE].
+    """
+    line = raw.decode("utf-8", errors="ignore").strip() if isinstance(raw, bytes) else raw.strip()
+    if line.startswith("data:"):
+        line = line[len("data:"):].strip()
+    if line == "[DONE]":
+        return None, None
+    try:
+        obj = json.loads(line)
+        token = obj.get("message", {}).get("content") or obj.get("response") or obj.get("text") or ""
+        return token, obj
+    except Exception:
+        return line, None
+
+
+class ChatStream:
+    """
+    Streaming chat call. The constructor waits for an LLM slot and opens the
+    connection, so LLMBusyError / requests errors surface before any response
+    is sent. Iterating yields tokens; the slot is released when iteration ends
+    or close() is called (routes use LLMStreamingResponse, which always closes),
+    and as a last resort when the stream is garbage collected.
+    """
+
+    def __init__(self, model, messages, priority=PRIORITY_INTERACTIVE, timeout=300, meta=None):
+        self.model = model
+        self.meta = meta or {}
+        self.request_id = self.meta.get("request_id") or uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.ttft = None
+        self.final = None
+        self._slot = None
+        self._r = None
+        self._slot = gate.acquire(priority)
+        try:
+            self._r = requests.post(
+                chat_url(),
+                json={"model": model, "messages": messages, "stream": True},
+                stream=True,
+                timeout=timeout,
+            )
+            self._r.raise_for_status()
+        except Exception:
+            self.close()
+            raise
+
+    def __iter__(self):
+        try:
+            for raw in self._r.iter_lines():
+                if not raw:
+                    continue
+                token, obj = parse_stream_line(raw)
+                if token is None:
+                    break
+                if token:
+                    if self.ttft is None:
+                        self.ttft = time.perf_counter() - self.started
+                    yield token
+                if obj is not None and obj.get("done"):
+                    self.final = obj
+                    break
+            self._record()
+        finally:
+            self.close()
+
+    def _record(self):
+        _capture(self.model, self.meta, self.request_id, self.ttft, time.perf_counter() - self.started, self.final or {})
+
+    def close(self):
+        """Idempotent: close the connection and give the LLM slot back."""
+        r, self._r = self._r, None
+        if r is not None:
+            r.close()
+        if self._slot is not None:
+            self._slot.release()
+
+    def __del__(self):
+        self.close()
+
+
+def _capture(model, meta, request_id, ttft, total, final):
+    # queue-only (no I/O) so it does not delay the end of the stream
+    tps = tokens_per_second(final)
+    record_generation(model, ttft, total, tps)
+    eval_duration = final.get("eval_duration")
+    analytics.writer.record({
+        "request_id": request_id,
+        "route": meta.get("route"),
+        "session_id": meta.get("session_id"),
+        "user_id": meta.get("user_id"),
+        "message": meta.get("message"),
+        "model": model,
+        "latency": total,
+        "ttft": ttft,
+        "tokens": final.get("eval_count"),
+        "prompt_tokens": final.get("prompt_eval_count"),
+        "eval_seconds": eval_duration / 1e9 if eval_duration else None,
+        "tokens_per_s": tps,
+    })
+
+
+def tokens_per_second(final):
+    """Decode throughput from Ollama's final message (eval_count / eval_duration in ns)."""
+    count, duration = final.get("eval_count"), final.get("eval_duration")
+    if count and duration:
+        return count / (duration / 1e9)
+    return None
+
+
+def chat(model, messages, priority=PRIORITY_BACKGROUND, timeout=120, meta=None):
+    """
+    Non-streaming chat call. Returns the assistant message content.
+    meta (route, session_id, message, request_id) is recorded with the call's timings.
+    """
+    started = time.perf_counter()
+    with gate.slot(priority):
+        r = requests.post(
+            chat_url(),
+            json={"model": model, "messages": messages, "stream": False},
+            timeout=timeout,
+        )
+        r.raise_for_status()
+        body = r.json()
+    meta = meta or {}
+    _capture(model, meta, meta.get("request_id") or uuid.uuid4().hex, None, time.perf_counter() - started, body)
+    return body.get("message", {}).get("content", "")
@@ -0,0 +1,131 @@
+"""
+ONNX Runtime CPU backend for the sentence-transformers text embedder
+(EMBED_BACKEND=onnx). The transformer is exported to ONNX once, optionally
+int8-quantized (dynamic quantization), and cached under EMBED_ONNX_DIR.
+Pooling and normalization follow the sentence-transformers pipeline, and at
+load time the output is checked against the PyTorch model so existing FAISS
+indexes stay compatible; if it drifts beyond EMBED_ONNX_MIN_COSINE the
+caller falls back to PyTorch.
+"""
+import importlib.util
+import os
+import re
+import numpy as np
+from .config import EMBED_ONNX_DIR, EMBED_ONNX_QUANTIZE, EMBED_ONNX_THREADS, EMBED_ONNX_MIN_COSINE
+from .logger import logger
+
+_VALIDATION_TEXTS = [
+    "How do I reset my password?",
+    "The quarterly report shows revenue grew by 12 percent.",
+    "Transformers use self-attention to model long-range dependencies in text.",
+    "a",
+    "Invoice #4821 is due on 2024-05-01; contact billing@example.com for questions. " * 8,
+]
+
+
+def _model_paths(model_name):
+    stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    return os.path.join(EMBED_ONNX_DIR, stem + ".onnx"), os.path.join(EMBED_ONNX_DIR, stem + ".int8.onnx")
+
+
+def export_onnx(st_model, model_name, quantize=EMBED_ONNX_QUANTIZE):
+    """Export the transformer of a SentenceTransformer to ONNX (and int8); returns the path to use."""
+    import torch
+    fp32_path, int8_path = _model_paths(model_name)
+    if not os.path.exists(fp32_path):
+        transformer = st_model[0].auto_model.eval()
+        sample = st_model.tokenizer(["export sample"], return_tensors="pt")
+        names = ["input_ids", "attention_mask"] + (["token_type_ids"] if "token_type_ids" in sample else [])
+        dynamic = {name: {0: "batch", 1: "seq"} for name in names}
+        dynamic["last_hidden_state"] = {0: "batch", 1: "seq"}
+        tmp = f"{fp32_path}.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer, tuple(sample[n] for n in names), tmp,
+                input_names=names, output_names=["last_hidden_state"],
+                dynamic_axes=dynamic, opset_version=14,
+            )
+        os.replace(tmp, fp32_path)
+        logger.info("Exported %s to ONNX at %s", model_name, fp32_path)
+    if not quantize:
+        return fp32_path
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        tmp = f"{int8_path}.{os.getpid()}.tmp"
+        quantize_dynamic(fp32_path, tmp, weight_type=QuantType.QInt8)
+        os.replace(tmp, int8_path)
+        logger.info("Quantized %s to int8 at %s", model_name, int8_path)
+    return int8_path
+
+
+class OnnxTextEmbedder:
+    """Drop-in for SentenceTransformer.encode on the embedding paths used by EmbeddingManager."""
+
+    def __init__(self, path, tokenizer, max_seq_length, threads=EMBED_ONNX_THREADS):
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+            opts.inter_op_num_threads = 1
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length
+        self.path = path
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        out = []
+        for start in range(0, len(texts), batch_size):
+            enc = self.tokenizer(
+                list(texts[start:start + batch_size]), padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np",
+            )
+            feeds = {name: enc[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            # mean pooling over non-padding tokens, as in the sentence-transformers Pooling layer
+            mask = feeds["attention_mask"][..., None].astype(hidden.dtype)
+            emb = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                emb = emb / np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+            out.append(emb.astype(np.float32))
+        if not out:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(out)
+
+
+def validate(onnx_model, st_model, min_cosine=EMBED_ONNX_MIN_COSINE):
+    """Return the lowest cosine similarity between ONNX and PyTorch embeddings on a fixed probe set."""
+    ref = st_model.encode(_VALIDATION_TEXTS, convert_to_numpy=True, normalize_embeddings=True)
+    got = onnx_model.encode(_VALIDATION_TEXTS, normalize_embeddings=True)
+    cosine = float(np.min(np.sum(ref * got, axis=1)))
+    logger.info("ONNX embedder validation: min cosine %.5f (threshold %.5f)", cosine, min_cosine)
+    return cosine
+
+
+def load_onnx_embedder(st_model, model_name, threads=EMBED_ONNX_THREADS):
+    """
+    Build an OnnxTextEmbedder for an already loaded SentenceTransformer.
+    Returns None (and logs why) if onnxruntime is unavailable, export fails or
+    validation is out of tolerance, so the caller keeps the PyTorch model.
+    """
+    if importlib.util.find_spec("onnxruntime") is None:
+        logger.warning("onnxruntime not installed, using the PyTorch text embedder")
+        return None
+    if not any(getattr(m, "pooling_mode_mean_tokens", False) for m in st_model):
+        logger.warning("%s does not use mean pooling, using the PyTorch text embedder", model_name)
+        return None
+    try:
+        path = export_onnx(st_model, model_name)
+        embedder = OnnxTextEmbedder(path, st_model.tokenizer, st_model.max_seq_length, threads=threads)
+        cosine = validate(embedder, st_model)
+    except Exception:
+        logger.exception("ONNX embedder setup failed, using the PyTorch text embedder")
+        return None
+    if cosine < EMBED_ONNX_MIN_COSINE:
+        logger.warning("ONNX embeddings out of tolerance (min cosine %.5f), using the PyTorch text embedder", cosine)
+        return None
+    logger.info("Using ONNX Runtime text embedder: %s", path)
+    return embedder
@@ -2,7 +2,12 @@
 High-level RAG API: add_document_to_index, retrieve
 Uses EmbeddingManager (dense + sparse hybrid) for retrieval.
 """
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from PIL import Image
 from .embedding_manager import get_manager
+from .ocr_extractor import ocr_pil_image
+from .config import CHUNK_SIZE, IMAGE_OCR_THREADS
 from .logger import logger
 
 def add_document_to_index(name: str, text: str, meta: dict = None):
@@ -11,12 +16,79 @@ def add_document_to_index(name: str, text: str, meta: dict = None):
     logger.info("Added %d chunks to index for %s", added, name)
     return added
 
+def add_transcript_to_index(name: str, transcript: dict, meta: dict = None):
+    """
+    Index a media transcript. Whisper segments are packed into chunks of at most
+    CHUNK_SIZE characters and each chunk's meta carries its start/end seconds.
+    """
+    chunks, metas = [], []
+    current, start, end = [], None, None
+    for sg in transcript.get("segments", []):
+        text = sg.get("text", "").strip()
+        if not text:
+            continue
+        if current and sum(len(t) + 1 for t in current) + len(text) > CHUNK_SIZE:
+            chunks.append(" ".join(current))
+            metas.append({**(meta or {}), "start": start, "end": end})
+            current, start = [], None
+        if start is None:
+            start = sg["start"]
+        current.append(text)
+        end = sg["end"]
+    if current:
+        chunks.append(" ".join(current))
+        metas.append({**(meta or {}), "start": start, "end": end})
+    m = get_manager()
+    added = m.add_chunks(name, chunks, metas)
+    logger.info("Added %d transcript chunks to index for %s", added, name)
+    return added
+
 def add_image_to_index(name: str, pil_image, meta: dict = None):
     m = get_manager()
     added = m.add_image(name, pil_image, meta=meta)
     logger.info("Added image embedding for %s", name)
     return added
 
+def add_images_to_index(items, meta: dict = None):
+    """
+    Index a batch of images given as [(name, image_bytes), ...].
+    Each image is decoded once; one CLIP forward pass over the whole batch runs
+    concurrently with Tesseract OCR of every image, and the OCR text is indexed as
+    text chunks linked to the image vector. The batch is committed once.
+    If CLIP is unavailable the OCR text is still indexed, as plain text chunks.
+    Returns {"images": vectors added, "ocr_texts": images with OCR text, "clip": bool}.
+    """
+    if not items:
+        return {"images": 0, "ocr_texts": 0, "clip": True}
+    m = get_manager()
+    names = [name for name, _ in items]
+    images = [Image.open(BytesIO(data)).convert("RGB") for _, data in items]
+    with ThreadPoolExecutor(max_workers=1 + max(1, IMAGE_OCR_THREADS)) as pool:
+        clip_future = pool.submit(m.embed_image_bytes, images)
+        ocr_futures = [pool.submit(ocr_pil_image, img, data) for img, (_, data) in zip(images, items)]
+        texts = [f.result() for f in ocr_futures]
+        try:
+            embeddings = clip_future.result()
+        except Exception as e:
+            logger.warning("CLIP embedding failed (%s), indexing OCR text only", e)
+            embeddings = None
+    with_text = sum(1 for t in texts if t.strip())
+    if embeddings is None:
+        for name, text in zip(names, texts):
+            if text.strip():
+                m.add_documents(name, text, meta={**(meta or {}), "ocr": True})
+        logger.info("Added OCR text of %d/%d images to index (no CLIP)", with_text, len(names))
+        return {"images": 0, "ocr_texts": with_text, "clip": False}
+    added = m.add_images(names, embeddings, ocr_texts=texts, metas=[meta] * len(names))
+    logger.info("Added %d images (%d with OCR text) to index", added, with_text)
+    return {"images": added, "ocr_texts": with_text, "clip": True}
+
+def remove_source_from_index(name: str):
+    """Tombstone a source; searches skip it at once, compaction reclaims the space."""
+    removed = get_manager().delete_source(name)
+    logger.info("Removed %d records of %s from index", removed, name)
+    return removed
+
 def retrieve(query: str, k: int = 3, alpha: float = 0.6):
     m = get_manager()
     results = m.hybrid_search(query, k=k, alpha=alpha)
@@ -0,0 +1,29 @@
+"""
+Per-model load state for the readiness endpoint.
+Components report "loading" / "ready" / "failed"; anything never reported is
+"not_loaded". Models load lazily on first use or in the startup warm-up.
+"""
+import time
+from threading import Lock
+
+_states = {}
+_lock = Lock()
+
+
+def set_state(name, state, error=None):
+    with _lock:
+        _states[name] = {"state": state, "since": time.time(), "error": str(error) if error else None}
+
+
+def get_state(name):
+    with _lock:
+        return _states.get(name, {"state": "not_loaded", "since": None, "error": None})["state"]
+
+
+def states():
+    with _lock:
+        return {name: dict(info) for name, info in _states.items()}
+
+
+def is_ready(required):
+    return all(get_state(name) == "ready" for name in required)
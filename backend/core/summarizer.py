@@ -0,0 +1,111 @@
+"""
+Hierarchical (map-reduce) summarization.
+Chunks are packed into groups of at most SUMMARY_GROUP_CHARS, each group is
+summarized in parallel (bounded by SUMMARY_MAP_CONCURRENCY and the LLM gate),
+partial summaries are reduced again until they fit one prompt, and the final
+reduce is streamed token by token. Failed groups are retried once; anything
+sampled away or still failing is reported in a "coverage" event.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .config import SUMMARY_GROUP_CHARS, SUMMARY_MAP_CONCURRENCY, SUMMARY_MAX_GROUPS, SUMMARY_CALL_TIMEOUT
+from .llm_gate import PRIORITY_BACKGROUND
+from .ollama_client import chat, ChatStream
+from .logger import logger
+
+
+def group_texts(texts, max_chars=SUMMARY_GROUP_CHARS):
+    """Greedily pack texts (in order) into groups of at most max_chars."""
+    groups, current, size = [], [], 0
+    for t in texts:
+        t = t[:max_chars]
+        if current and size + len(t) > max_chars:
+            groups.append(current)
+            current, size = [], 0
+        current.append(t)
+        size += len(t)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _fit_budget(texts, max_chars=SUMMARY_GROUP_CHARS, max_groups=SUMMARY_MAX_GROUPS):
+    """
+    Keep the map step within SUMMARY_MAX_GROUPS calls so latency stays predictable:
+    if the source is larger, keep an evenly spaced subset of chunks.
+    """
+    total = sum(len(t) for t in texts)
+    budget = max_chars * max_groups
+    if total <= budget:
+        return texts
+    keep = max(1, int(len(texts) * budget / total))
+    kept = [texts[int(i * len(texts) / keep)] for i in range(keep)]
+    logger.info("Summary input %d chars exceeds budget %d, sampled %d/%d chunks", total, budget, len(kept), len(texts))
+    return kept
+
+
+def _prompt(texts, focus=None, partial=False):
+    what = "partial summaries of one document" if partial else "excerpts of a document"
+    focus_line = f"Focus on: {focus}\n\n" if focus else ""
+    body = "\n\n".join(texts)
+    return f"Summarize the following {what}.\n{focus_line}\n{body}\n\nSummary:"
+
+
+def _summarize_group(model, texts, focus, partial, meta=None):
+    messages = [{"role": "user", "content": _prompt(texts, focus, partial)}]
+    return chat(model, messages, priority=PRIORITY_BACKGROUND, timeout=SUMMARY_CALL_TIMEOUT, meta=meta)
+
+
+def summarize_stream(model, texts, focus=None, meta=None):
+    """
+    Generator for the whole map-reduce run. Yields ("progress", stage, done, total)
+    while groups are summarized, one ("coverage", info) before the final reduce
+    (chunks sampled and groups dropped, if any), then ("token", token) for the
+    streamed final reduce. Groups that fail twice are logged and dropped.
+    """
+    texts = [t for t in texts if t and t.strip()]
+    total_chunks = len(texts)
+    texts = _fit_budget(texts)
+    if not texts:
+        raise ValueError("Nothing to summarize.")
+    coverage = {"chunks_total": total_chunks, "chunks_used": len(texts), "groups_dropped": 0}
+    level = 0
+    with ThreadPoolExecutor(max_workers=max(1, SUMMARY_MAP_CONCURRENCY)) as pool:
+        while sum(len(t) for t in texts) > SUMMARY_GROUP_CHARS and len(texts) > 1:
+            stage = "map" if level == 0 else f"reduce-{level}"
+            groups = group_texts(texts)
+            if level > 0 and len(groups) >= len(texts):
+                # partial summaries no longer shrink: tighten the per-summary budget so
+                # at least two fit per group and every partial still reaches the final reduce
+                texts = [t[:SUMMARY_GROUP_CHARS // 2] for t in texts]
+                groups = group_texts(texts)
+                logger.info("Partial summaries did not shrink; truncated %d partials to %d chars",
+                            len(texts), SUMMARY_GROUP_CHARS // 2)
+            results = [None] * len(groups)
+            futures = {pool.submit(_summarize_group, model, g, focus, level > 0, meta): i for i, g in enumerate(groups)}
+            for done, fut in enumerate(as_completed(futures), 1):
+                i = futures[fut]
+                try:
+                    results[i] = fut.result()
+                except Exception:
+                    logger.exception("Summary %s step failed for group %d/%d", stage, i + 1, len(groups))
+                yield ("progress", stage, done, len(groups))
+            failed = [i for i, r in enumerate(results) if not r]
+            if failed:
+                # one retry per failed group before it is dropped
+                retries = {pool.submit(_summarize_group, model, groups[i], focus, level > 0, meta): i for i in failed}
+                for fut in as_completed(retries):
+                    i = retries[fut]
+                    try:
+                        results[i] = fut.result()
+                    except Exception:
+                        logger.exception("Summary %s retry failed for group %d/%d, dropping it", stage, i + 1, len(groups))
+                coverage["groups_dropped"] += sum(1 for r in results if not r)
+            texts = [r for r in results if r]
+            if not texts:
+                raise RuntimeError("All summary map steps failed.")
+            level += 1
+    coverage["complete"] = coverage["chunks_used"] == coverage["chunks_total"] and not coverage["groups_dropped"]
+    yield ("coverage", coverage)
+    messages = [{"role": "user", "content": _prompt(group_texts(texts)[0], focus, level > 0)}]
+    for token in ChatStream(model, messages, priority=PRIORITY_BACKGROUND, timeout=SUMMARY_CALL_TIMEOUT, meta=meta):
+        yield ("token", token)
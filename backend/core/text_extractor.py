@@ -1,10 +1,15 @@
 import os
 from io import StringIO
 from ..core.logger import logger
+from ..core.config import MEDIA_EXTENSIONS, PDF_OCR_MIN_CHARS
+from ..core.ocr_extractor import ocr_pdf_pages
+from ..core.audio_transcriber import transcribe_media
+from ..core.metrics import timed
 from PyPDF2 import PdfReader
 import docx
 import pandas as pd
 
+@timed("extraction")
 def extract_text_from_file(path):
     ext = os.path.splitext(path)[1].lower()
     try:
@@ -13,6 +18,13 @@ def extract_text_from_file(path):
             text = []
             for p in reader.pages:
                 text.append(p.extract_text() or "")
+            # pages without a usable text layer (scans) are rasterized and OCR'd in parallel
+            scanned = [i for i, t in enumerate(text) if len(t.strip()) < PDF_OCR_MIN_CHARS]
+            if scanned:
+                logger.info("OCR'ing %d/%d pages without text layer in %s", len(scanned), len(text), path)
+                for i, t in ocr_pdf_pages(path, scanned).items():
+                    if len(t.strip()) > len(text[i].strip()):
+                        text[i] = t
             return "\n".join(text)
         elif ext == ".docx":
             doc = docx.Document(path)
@@ -20,6 +32,10 @@ def extract_text_from_file(path):
         elif ext in [".txt", ".md", ".py", ".js"]:
             with open(path, "r", encoding="utf-8", errors="ignore") as f:
                 return f.read()
+        elif ext in MEDIA_EXTENSIONS:
+            # audio/video: Whisper transcript, cached by content hash
+            with open(path, "rb") as f:
+                return transcribe_media(f.read())["text"]
         elif ext == ".csv":
             df = pd.read_csv(path, encoding="utf-8", errors="ignore")
             return df.to_csv(index=False)
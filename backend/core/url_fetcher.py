@@ -0,0 +1,190 @@
+"""
+URL fetching for url-chat / url-ingest.
+ - one pooled httpx.AsyncClient (keep-alive) shared by all requests
+ - per-host concurrency limits so crawling many URLs doesn't hammer one site
+   (kept only while a host has requests in flight)
+ - conditional GET (ETag / Last-Modified): unchanged pages are answered from
+   the on-disk cache and flagged so callers skip re-embedding
+ - HTML is converted to text incrementally while the body streams in
+"""
+import asyncio
+import codecs
+import hashlib
+import json
+import os
+from contextlib import asynccontextmanager
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+import httpx
+from .config import URL_FETCH_TIMEOUT, URL_MAX_CONNECTIONS, URL_PER_HOST_CONCURRENCY, URL_MAX_BYTES, URL_CACHE_DIR
+from .logger import logger
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+_BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "pre", "blockquote"}
+
+
+class _TextExtractor(HTMLParser):
+    """Incremental HTML → text: feed() chunks as they arrive, read .text() at the end."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+        elif tag in _BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._parts.append(data)
+
+    def text(self):
+        lines = (" ".join(line.split()) for line in "".join(self._parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+_client = None
+_host_limits = {}  # host -> [semaphore, requests using it]
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=URL_FETCH_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=URL_MAX_CONNECTIONS, max_keepalive_connections=URL_MAX_CONNECTIONS),
+            headers={"User-Agent": "Multi-Modal-RAG-Q-A/1.0"},
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@asynccontextmanager
+async def _host_limit(url):
+    # entries are dropped when their last request finishes, so the map only
+    # holds hosts with requests in flight (event-loop only, no lock needed)
+    host = urlparse(url).netloc.lower()
+    entry = _host_limits.setdefault(host, [asyncio.Semaphore(URL_PER_HOST_CONCURRENCY), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0 and _host_limits.get(host) is entry:
+            del _host_limits[host]
+
+
+def _decoder(encoding):
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def _cache_path(url):
+    return os.path.join(URL_CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def _load_cached(url):
+    path = _cache_path(url)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            logger.exception("Failed to read url cache for %s", url)
+    return None
+
+
+def save_cached(url, record):
+    path = _cache_path(url)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(tmp, path)
+
+
+async def fetch_url(url):
+    """
+    Fetch a page and return its cache record:
+    {url, text, content_hash, etag, last_modified, indexed, stale_indexed, changed}.
+    changed is False when the server answered 304 or the content hash is unchanged.
+    stale_indexed is True while an older version of the page is still in the KB.
+    """
+    if urlparse(url).scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported URL scheme: {url}")
+    cached = _load_cached(url)
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    async with _host_limit(url):
+        async with get_client().stream("GET", url, headers=headers) as resp:
+            if resp.status_code == 304 and cached:
+                logger.info("URL not modified: %s", url)
+                return {**cached, "changed": False}
+            resp.raise_for_status()
+            ctype = resp.headers.get("content-type", "")
+            is_html = "html" in ctype or not ctype
+            parser = _TextExtractor() if is_html else None
+            parts = []
+            hasher = hashlib.sha256()
+            size = 0
+            decoder = _decoder(resp.encoding)
+
+            def consume(chunk):
+                hasher.update(chunk.encode("utf-8", errors="ignore"))
+                if parser:
+                    parser.feed(chunk)
+                else:
+                    parts.append(chunk)
+
+            async for raw in resp.aiter_bytes():
+                # the cap counts body bytes (after content-encoding), not decoded characters
+                size += len(raw)
+                if size > URL_MAX_BYTES:
+                    raise ValueError(f"Page larger than {URL_MAX_BYTES} bytes: {url}")
+                consume(decoder.decode(raw))
+            consume(decoder.decode(b"", final=True))
+            if parser:
+                parser.close()
+                text = parser.text()
+            else:
+                text = "".join(parts)
+            etag = resp.headers.get("etag")
+            last_modified = resp.headers.get("last-modified")
+
+    content_hash = hasher.hexdigest()
+    changed = not cached or cached.get("content_hash") != content_hash
+    record = {
+        "url": url,
+        "text": text,
+        "content_hash": content_hash,
+        "etag": etag,
+        "last_modified": last_modified,
+        "indexed": bool(cached and cached.get("indexed") and not changed),
+        "stale_indexed": bool(cached and (cached.get("stale_indexed") or (changed and cached.get("indexed")))),
+    }
+    save_cached(url, record)
+    logger.info("Fetched %s (%d chars, changed=%s)", url, len(text), changed)
+    return {**record, "changed": changed}
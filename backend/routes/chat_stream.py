@@ -1,61 +1,52 @@
 import json
 import requests
 import time
+from typing import Optional
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from ..core.logger import logger
-from ..core.config import OLLAMA_HOST, OLLAMA_PORT, OLLAMA_TEXT_MODEL
+from ..core.config import OLLAMA_TEXT_MODEL
 from ..core.model_selector import select_model
+from ..core.llm_gate import LLMBusyError, PRIORITY_INTERACTIVE
+from ..core.ollama_client import ChatStream
+from ..core.llm_response import LLMStreamingResponse
 
 router = APIRouter()
 
 class StreamQuery(BaseModel):
     question: str
+    session_id: Optional[str] = None
 
 @router.post("/chat-stream")
-async def chat_stream(payload: StreamQuery):
+def chat_stream(payload: StreamQuery):
     """
     SSE-style streaming endpoint to proxy Ollama output.
+    Returns 429 with Retry-After when the LLM queue is full.
     """
     try:
         prompt = payload.question
         model = select_model("text") or OLLAMA_TEXT_MODEL
-        ollama_url = f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/api/chat"
-        req_payload = {"model": model, "messages": [{"role": "user", "content": prompt}], "stream": True}
-
-        with requests.post(ollama_url, json=req_payload, stream=True, timeout=300) as r:
-            r.raise_for_status()
-
-            def event_gen():
-                for raw in r.iter_lines():
-                    if not raw:
-                        continue
-                    # Convert bytes to string safely
-                    line = raw.decode("utf-8", errors="ignore") if isinstance(raw, bytes) else raw.strip()
-                    if not line:
-                        continue
-
-                    if line.startswith("data:"):
-                        payload_text = line[len("data:"):].strip()
-                    else:
-                        payload_text = line
-
-                    if payload_text == "[DONE]":
-                        break
-
-                    try:
-                        obj = json.loads(payload_text)
-                        token = obj.get("message", {}).get("content") or obj.get("response") or obj.get("text") or payload_text
-                    except Exception:
-                        token = payload_text
-
-                    yield f"data: {json.dumps({'token': token}, ensure_ascii=False)}\n\n"
-                    time.sleep(0.01)
-
-                yield f"data: {json.dumps({'token': ''})}\n\n"
-
-            return StreamingResponse(event_gen(), media_type="text/event-stream")
+        stream = ChatStream(
+            model, [{"role": "user", "content": prompt}], priority=PRIORITY_INTERACTIVE,
+            meta={"route": "chat-stream", "session_id": payload.session_id, "message": prompt},
+        )
+
+        def event_gen():
+            for token in stream:
+                yield f"data: {json.dumps({'token': token}, ensure_ascii=False)}\n\n"
+                time.sleep(0.01)
+
+            yield f"data: {json.dumps({'token': ''})}\n\n"
+
+        return LLMStreamingResponse(
+            event_gen(),
+            stream,
+            media_type="text/event-stream",
+            headers={"X-Request-ID": stream.request_id},
+        )
+
+    except LLMBusyError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
     except requests.exceptions.RequestException as e:
         logger.exception("Ollama connection failed")
@@ -2,12 +2,19 @@ import os
 import json
 import requests
 from fastapi import APIRouter, UploadFile, File, Form
-from fastapi.responses import StreamingResponse, JSONResponse
-from ..core.config import UPLOAD_DIR, MAX_FILE_SIZE_MB, ALLOWED_EXTENSIONS, OLLAMA_HOST, OLLAMA_PORT, OLLAMA_TEXT_MODEL
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from ..core.config import UPLOAD_DIR, MAX_FILE_SIZE_MB, ALLOWED_EXTENSIONS, OLLAMA_TEXT_MODEL, FILE_CHAT_TOP_K
 from ..core.text_extractor import extract_text_from_file
 from ..core.rag_engine import retrieve   # only retrieval, no indexing
+from ..core.file_cache import content_hash, get_entry, build_entry, top_chunks
 from ..core.logger import logger
 from ..core.model_selector import select_model
+from ..core.llm_gate import LLMBusyError, PRIORITY_INTERACTIVE
+from ..core.executors import run_in_pool, PoolBusyError
+from ..core.ollama_client import ChatStream
+from ..core.llm_response import LLMStreamingResponse
+from ..core.metrics import timed
 
 router = APIRouter()
 
@@ -19,42 +26,64 @@ def validate_file(fname: str):
 
 @router.post("/file-chat")
 async def chat_with_file(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     question: str = Form(...),
     template: str = Form("qa"),
-    session_id: str = Form(None)
+    session_id: str = Form(None),
+    file_hash: str = Form(None)
 ):
     """
     Chat ONLY with the file provided, WITHOUT adding it to the Knowledge Base.
     Extracts text → builds temp context → sends to Ollama → returns streaming output.
+    The file's content hash is returned in the X-File-Hash header; follow-up questions
+    can send only file_hash + question and reuse the cached extraction and embeddings.
     """
     try:
-        # -------- Validate file --------
-        if not validate_file(file.filename):
-            return JSONResponse(status_code=400, content={"error": "Unsupported file type."})
+        entry = None
 
-        contents = await file.read()
+        if file is None:
+            # -------- Follow-up question by hash --------
+            if not file_hash:
+                return JSONResponse(status_code=400, content={"error": "Provide a file or a file_hash."})
+            entry = get_entry(file_hash)
+            if entry is None:
+                return JSONResponse(status_code=404, content={"error": "Unknown or expired file_hash, please re-upload the file."})
+        else:
+            # -------- Validate file --------
+            if not validate_file(file.filename):
+                return JSONResponse(status_code=400, content={"error": "Unsupported file type."})
 
-        if len(contents) > MAX_FILE_SIZE_MB * 1024 * 1024:
-            return JSONResponse(status_code=400, content={"error": "File too large."})
+            with timed("upload"):
+                contents = await file.read()
 
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
+            if len(contents) > MAX_FILE_SIZE_MB * 1024 * 1024:
+                return JSONResponse(status_code=400, content={"error": "File too large."})
 
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(file_path, "wb") as f:
-            f.write(contents)
+            file_hash = content_hash(contents)
+            entry = get_entry(file_hash)
 
-        # -------- Extract text --------
-        text = extract_text_from_file(file_path)
+        if entry is None:
+            os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-        if not text or len(text.strip()) == 0:
-            return JSONResponse(
-                status_code=200,
-                content={"answer": "⚠️ Could not extract text or empty file."}
-            )
+            file_path = os.path.join(UPLOAD_DIR, file.filename)
+            with open(file_path, "wb") as f:
+                f.write(contents)
+
+            # -------- Extract text --------
+            text = await run_in_pool("extract", extract_text_from_file, file_path)
+
+            if not text or len(text.strip()) == 0:
+                return JSONResponse(
+                    status_code=200,
+                    content={"answer": "⚠️ Could not extract text or empty file."}
+                )
+
+            entry = await run_in_pool("embed", build_entry, file_hash, text, name=file.filename)
+        else:
+            logger.info("file_chat cache hit for %s", file_hash)
 
         # -------- Prepare context ONLY from this file --------
-        context = text[:3000]  # limit to avoid huge prompts
+        context = "\n\n".join(await run_in_pool("embed", top_chunks, entry, question, k=FILE_CHAT_TOP_K))
 
         # -------- Build prompt --------
         prompt = (
@@ -66,45 +95,17 @@ async def chat_with_file(
 
         # -------- Select model --------
         model = select_model("text") or OLLAMA_TEXT_MODEL
-        payload = {
-            "model": model,
-            "stream": True,
-            "messages": [{"role": "user", "content": prompt}]
-        }
+        messages = [{"role": "user", "content": prompt}]
 
-        ollama_url = f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/api/chat"
+        # waits for an LLM slot off the event loop; raises LLMBusyError when the queue is full
+        meta = {"route": "file-chat", "session_id": session_id, "message": question}
+        stream = await run_in_threadpool(ChatStream, model, messages, PRIORITY_INTERACTIVE, meta=meta)
 
         # -------- Streaming generator --------
         def ollama_stream():
             try:
-                with requests.post(ollama_url, json=payload, stream=True, timeout=300) as r:
-                    r.raise_for_status()
-
-                    for raw in r.iter_lines():
-                        if not raw:
-                            continue
-                        line = raw.decode("utf-8", errors="ignore").strip()
-
-                        if line.startswith("data:"):
-                            payload_text = line[len("data:"):].strip()
-                        else:
-                            payload_text = line
-
-                        if payload_text == "[DONE]":
-                            break
-
-                        try:
-                            data = json.loads(payload_text)
-                            token = (
-                                data.get("message", {}).get("content") or
-                                data.get("response") or
-                                data.get("text") or
-                                payload_text
-                            )
-                        except Exception:
-                            token = payload_text
-
-                        yield f"data: {json.dumps({'content': token}, ensure_ascii=False)}\n\n"
+                for token in stream:
+                    yield f"data: {json.dumps({'content': token}, ensure_ascii=False)}\n\n"
 
                 yield "data: {\"content\": \"\"}\n\n"
 
@@ -112,7 +113,19 @@ async def chat_with_file(
                 logger.exception("Streaming error from Ollama")
                 yield f"data: {json.dumps({'content': '[ERROR] ' + str(e)})}\n\n"
 
-        return StreamingResponse(ollama_stream(), media_type="text/event-stream")
+        return LLMStreamingResponse(
+            ollama_stream(),
+            stream,
+            media_type="text/event-stream",
+            headers={"X-File-Hash": file_hash, "X-Request-ID": stream.request_id},
+        )
+
+    except (LLMBusyError, PoolBusyError) as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": str(e.retry_after)})
+
+    except requests.exceptions.RequestException as e:
+        logger.exception("Ollama connection failed")
+        return JSONResponse(status_code=502, content={"error": f"Ollama connection failed: {str(e)}"})
 
     except Exception as e:
         logger.exception("file_chat error")
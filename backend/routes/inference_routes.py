@@ -1,12 +1,55 @@
+import asyncio
+from typing import List, Optional
 from fastapi import APIRouter, Form
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 from ..core.logger import logger
+from ..core.llm_gate import LLMBusyError
+from ..core.inference_batcher import get_batcher
 
 router = APIRouter()
 
+class BulkInfer(BaseModel):
+    prompts: List[str]
+    model: Optional[str] = None
+    system: Optional[str] = None
+
 @router.post("/infer")
-def infer(prompt: str = Form(...)):
+async def infer(prompt: str = Form(...), model: str = Form(None), system: str = Form(None)):
+    """
+    Synchronous (non-streaming) inference through the micro-batcher.
+    """
+    try:
+        fut = get_batcher().submit(prompt, model=model, system=system)
+        response = await asyncio.wrap_future(fut)
+        return {"ok": True, "response": response}
+    except LLMBusyError as e:
+        return JSONResponse(status_code=429, content={"ok": False, "error": str(e)}, headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logger.exception("infer error")
+        return JSONResponse(status_code=500, content={"ok": False, "error": str(e)})
+
+@router.post("/infer-bulk")
+async def infer_bulk(payload: BulkInfer):
     """
-    Simple synchronous inference placeholder (non-streaming).
+    Bulk variant: runs every prompt through the micro-batcher and returns
+    per-prompt results in input order.
     """
-    logger.info("infer called")
-    return {"ok": False, "message": "Infer route not implemented (future enhancement)."}
+    batcher = get_batcher()
+    futures = []
+    for p in payload.prompts:
+        try:
+            futures.append(asyncio.wrap_future(batcher.submit(p, model=payload.model, system=payload.system)))
+        except LLMBusyError as e:
+            futures.append(e)
+    results = []
+    for f in futures:
+        if isinstance(f, Exception):
+            results.append({"ok": False, "error": str(f)})
+            continue
+        try:
+            results.append({"ok": True, "response": await f})
+        except Exception as e:
+            logger.warning("infer-bulk item failed: %s", e)
+            results.append({"ok": False, "error": str(e)})
+    return {"ok": True, "results": results}
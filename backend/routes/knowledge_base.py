@@ -1,28 +1,89 @@
 import os
-from fastapi import APIRouter, UploadFile, File
+from typing import List
+from fastapi import APIRouter, UploadFile, File, Form
 from fastapi.responses import JSONResponse
-from ..core.rag_engine import add_document_to_index
+from ..core.rag_engine import (
+    add_document_to_index, add_transcript_to_index, add_images_to_index, remove_source_from_index,
+)
+from ..core.audio_transcriber import transcribe_media
 from ..core.text_extractor import extract_text_from_file
+from ..core.executors import run_in_pool, PoolBusyError
 from ..core.logger import logger
-from ..core.config import UPLOAD_DIR, MAX_FILE_SIZE_MB
+from ..core.metrics import timed
+from ..core.config import UPLOAD_DIR, MAX_FILE_SIZE_MB, MEDIA_EXTENSIONS, IMAGE_EXTENSIONS
 
 router = APIRouter()
 
 @router.post("/add-to-kb")
 async def add_to_kb(file: UploadFile = File(...)):
     try:
-        contents = await file.read()
+        with timed("upload"):
+            contents = await file.read()
         if len(contents) > MAX_FILE_SIZE_MB * 1024 * 1024:
             return JSONResponse(status_code=400, content={"error": "File too large."})
         os.makedirs(UPLOAD_DIR, exist_ok=True)
         path = os.path.join(UPLOAD_DIR, file.filename)
         with open(path, "wb") as f:
             f.write(contents)
-        text = extract_text_from_file(path)
+        ext = os.path.splitext(file.filename)[1].lower()
+        if ext in IMAGE_EXTENSIONS:
+            # image: CLIP vector + OCR text chunks linked to it
+            result = await run_in_pool("embed", add_images_to_index, [(file.filename, contents)])
+            return {"ok": bool(result["images"] or result["ocr_texts"]), "added_images": result["images"],
+                    "ocr_texts": result["ocr_texts"], "clip": result["clip"]}
+        if ext in MEDIA_EXTENSIONS:
+            # audio/video: transcribe (cached by content hash) and index timestamped chunks
+            transcript = await run_in_pool("whisper", transcribe_media, contents)
+            meta = {"media": True, "content_hash": transcript["content_hash"]}
+            added = await run_in_pool("embed", add_transcript_to_index, file.filename, transcript, meta)
+            if not added:
+                return JSONResponse(status_code=200, content={"ok": False, "message": "No speech transcribed."})
+            return {"ok": True, "added_chunks": added}
+        text = await run_in_pool("extract", extract_text_from_file, path)
         if not text:
             return JSONResponse(status_code=200, content={"ok": False, "message": "No text extracted."})
-        added = add_document_to_index(file.filename, text)
+        added = await run_in_pool("embed", add_document_to_index, file.filename, text)
         return {"ok": True, "added_chunks": added}
+    except PoolBusyError as e:
+        return JSONResponse(status_code=429, content={"ok": False, "error": str(e)}, headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.exception("add-to-kb error")
         return JSONResponse(status_code=500, content={"ok": False, "error": str(e)})
+
+@router.post("/add-images-to-kb")
+async def add_images_to_kb(files: List[UploadFile] = File(...)):
+    """
+    Batched image ingestion: one CLIP forward pass and one index commit for the
+    whole upload, with OCR running concurrently.
+    """
+    try:
+        items = []
+        for f in files:
+            if os.path.splitext(f.filename)[1].lower() not in IMAGE_EXTENSIONS:
+                return JSONResponse(status_code=400, content={"ok": False, "error": f"Unsupported image type: {f.filename}"})
+            with timed("upload"):
+                contents = await f.read()
+            if len(contents) > MAX_FILE_SIZE_MB * 1024 * 1024:
+                return JSONResponse(status_code=400, content={"ok": False, "error": f"File too large: {f.filename}"})
+            items.append((f.filename, contents))
+        result = await run_in_pool("embed", add_images_to_index, items)
+        return {"ok": True, "added_images": result["images"], "ocr_texts": result["ocr_texts"], "clip": result["clip"]}
+    except PoolBusyError as e:
+        return JSONResponse(status_code=429, content={"ok": False, "error": str(e)}, headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logger.exception("add-images-to-kb error")
+        return JSONResponse(status_code=500, content={"ok": False, "error": str(e)})
+
+@router.post("/remove-from-kb")
+async def remove_from_kb(source: str = Form(...)):
+    """Remove a source from the knowledge base (tombstoned until the next offline compaction)."""
+    try:
+        removed = await run_in_pool("embed", remove_source_from_index, source)
+        if not removed:
+            return JSONResponse(status_code=404, content={"ok": False, "error": f"Unknown source: {source}"})
+        return {"ok": True, "removed_chunks": removed}
+    except PoolBusyError as e:
+        return JSONResponse(status_code=429, content={"ok": False, "error": str(e)}, headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logger.exception("remove-from-kb error")
+        return JSONResponse(status_code=500, content={"ok": False, "error": str(e)})
@@ -1,6 +1,8 @@
+from typing import List
 from fastapi import APIRouter, UploadFile, File
 from fastapi.responses import JSONResponse
-from ..core.ocr_extractor import extract_text_from_image_bytes
+from ..core.ocr_extractor import extract_text_from_image_bytes, ocr_images_batch
+from ..core.executors import run_in_pool, PoolBusyError
 from ..core.logger import logger
 
 router = APIRouter()
@@ -9,8 +11,26 @@ router = APIRouter()
 async def extract_text(file: UploadFile = File(...)):
     try:
         contents = await file.read()
-        text = extract_text_from_image_bytes(contents)
+        text = await run_in_pool("ocr", extract_text_from_image_bytes, contents)
         return {"answer": text}
+    except PoolBusyError as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.exception("OCR route error")
         return JSONResponse(status_code=500, content={"error": str(e)})
+
+@router.post("/extract-text-from-images")
+async def extract_text_batch(files: List[UploadFile] = File(...)):
+    """
+    Batch OCR: images are preprocessed and OCR'd in parallel across the OCR
+    process pool; previously seen images are answered from the hash cache.
+    """
+    try:
+        contents = [await f.read() for f in files]
+        texts = await run_in_pool("ocr", ocr_images_batch, contents)
+        return {"results": [{"filename": f.filename, "text": t} for f, t in zip(files, texts)]}
+    except PoolBusyError as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logger.exception("Batch OCR route error")
+        return JSONResponse(status_code=500, content={"error": str(e)})
@@ -1,30 +1,73 @@
+import json
 from fastapi import APIRouter, Form
+from fastapi.responses import JSONResponse, StreamingResponse
 from ..core.logger import logger
 from ..core.rag_engine import retrieve
+from ..core.embedding_manager import get_manager
 from ..core.model_selector import select_model
-from ..core.config import OLLAMA_HOST, OLLAMA_PORT
-import requests
+from ..core.llm_gate import LLMBusyError, PRIORITY_BACKGROUND
+from ..core.ollama_client import chat
+from ..core.summarizer import summarize_stream
 
 router = APIRouter()
 
 @router.post("/auto-summarize")
-def summarize_text(query: str = Form(...), topk: int = 5):
+def summarize_text(
+    query: str = Form(None),
+    topk: int = 5,
+    mode: str = Form("simple"),
+    source: str = Form(None),
+):
     """
-    Simple summarization using retrieved context + Ollama.
+    Summarization using Ollama. Runs at background priority behind interactive chat.
+
+    mode="simple": summarize the top-k retrieved chunks in one call, returns JSON.
+    mode="hierarchical": map-reduce over whole sources (the given source, or every
+    source that appears in the top-k hits for query), streamed over SSE.
     """
     try:
+        model = select_model("text")
+
+        if mode == "hierarchical":
+            if source:
+                sources = [source]
+            elif query:
+                sources = list(dict.fromkeys(d.get("source") for d in retrieve(query, k=topk) if not d.get("is_image")))
+            else:
+                return JSONResponse(status_code=400, content={"error": "Provide a query or a source."})
+            manager = get_manager()
+            texts = [c.get("text", "") for s in sources for c in manager.chunks_for_source(s)]
+            if not texts:
+                return JSONResponse(status_code=404, content={"error": "No indexed content for the requested sources."})
+            logger.info("Hierarchical summary over %d chunks from %s", len(texts), sources)
+
+            def event_gen():
+                try:
+                    for event in summarize_stream(model, texts, focus=query, meta={"route": "auto-summarize", "message": query}):
+                        if event[0] == "progress":
+                            _, stage, done, total = event
+                            yield f"data: {json.dumps({'stage': stage, 'done': done, 'total': total})}\n\n"
+                        elif event[0] == "coverage":
+                            yield f"data: {json.dumps({'coverage': event[1]})}\n\n"
+                        else:
+                            yield f"data: {json.dumps({'token': event[1]}, ensure_ascii=False)}\n\n"
+                    yield f"data: {json.dumps({'token': ''})}\n\n"
+                except Exception as e:
+                    logger.exception("hierarchical summarize error")
+                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
+
+            return StreamingResponse(event_gen(), media_type="text/event-stream")
+
+        if not query:
+            return JSONResponse(status_code=400, content={"error": "Provide a query."})
         docs = retrieve(query, k=topk)
         context = "\n\n".join([d.get("text", "") for d in docs])
         prompt = f"Summarize the following context:\n\n{context}\n\nSummary:"
-        model = select_model("text")
-        r = requests.post(f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/api/chat", json={"model": model, "messages":[{"role":"user","content":prompt}]}, timeout=60)
-        if r.ok:
-            try:
-                return r.json()
-            except:
-                return {"answer": r.text}
-        else:
-            return {"error": r.text}
+        answer = chat(model, [{"role": "user", "content": prompt}], priority=PRIORITY_BACKGROUND, timeout=60,
+                      meta={"route": "auto-summarize", "message": query})
+        return {"answer": answer}
+    except LLMBusyError as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.exception("summarize error")
         return {"error": str(e)}
@@ -1,17 +1,57 @@
+import asyncio
 import json
 from fastapi import APIRouter, UploadFile, File, Form
-from fastapi.responses import JSONResponse
-from ..core.audio_transcriber import transcribe_audio_bytes, append_chunk_and_maybe_transcribe
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from ..core.audio_transcriber import (
+    decode_audio_bytes, transcribe_pcm, transcribe_segmented, stitch_segments,
+    append_chunk_and_maybe_transcribe, finish_live_session, whisper_pool, SAMPLE_RATE,
+    LiveSessionLimitError, live_session_stats,
+)
+from ..core.config import LONG_AUDIO_SECONDS
+from ..core.executors import run_in_pool, PoolBusyError
 from ..core.logger import logger
 
 router = APIRouter()
 
 @router.post("/transcribe-audio")
-async def transcribe_audio(file: UploadFile = File(...), model: str = Form("small")):
+async def transcribe_audio(file: UploadFile = File(...), model: str = Form("small"), stream: bool = Form(False)):
+    """
+    Transcribe an uploaded recording.
+    Recordings longer than LONG_AUDIO_SECONDS (or any recording with stream=True) are
+    split on silence and transcribed in parallel across a process pool; with
+    stream=True timestamped segments are sent over SSE as they finish, followed by
+    the stitched transcript.
+    """
     try:
         contents = await file.read()
-        text = transcribe_audio_bytes(contents, model_size=model)
+        audio = await run_in_pool("whisper", decode_audio_bytes, contents)
+
+        if stream:
+            def event_gen():
+                parts = []
+                try:
+                    for part in transcribe_segmented(audio, model_size=model):
+                        parts.append(part)
+                        yield f"data: {json.dumps({'segment': {k: part[k] for k in ('index', 'total', 'start', 'end', 'text')}}, ensure_ascii=False)}\n\n"
+                    text, segments = stitch_segments(parts)
+                    yield f"data: {json.dumps({'answer': text, 'segments': segments}, ensure_ascii=False)}\n\n"
+                except Exception as e:
+                    logger.exception("segmented transcription error")
+                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
+
+            return StreamingResponse(event_gen(), media_type="text/event-stream")
+
+        if len(audio) > LONG_AUDIO_SECONDS * SAMPLE_RATE:
+            # the work runs in the segment process pool; this thread only waits for it
+            parts = await run_in_threadpool(lambda: list(transcribe_segmented(audio, model_size=model)))
+            text, segments = stitch_segments(parts)
+            return {"answer": text, "segments": segments}
+
+        text = await run_in_pool("whisper", transcribe_pcm, audio, model_size=model)
         return {"answer": text}
+    except PoolBusyError as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.exception("transcribe_audio error")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -20,15 +60,32 @@ async def transcribe_audio(file: UploadFile = File(...), model: str = Form("smal
 async def transcribe_stream(session_id: str = Form(...), chunk_b64: str = Form(...), final: bool = Form(False), model: str = Form("small")):
     """
     Accept base64-encoded chunk and append server-side.
-    When final=True, transcribe full recording and return the transcript.
+    Full windows are transcribed in the background as audio arrives; every call
+    returns the partial transcript so far, and final=True returns the full transcript.
     This simple API enables live capture: the frontend can post many small chunks and set final when done.
     """
     try:
-        text_or_none = append_chunk_and_maybe_transcribe(session_id, chunk_b64, final=final, model_size=model)
+        # appends only decode; transcription runs on the live workers, off the whisper pool
+        text = await run_in_pool("live", append_chunk_and_maybe_transcribe, session_id, chunk_b64, final=final, model_size=model)
         if final:
-            return {"answer": text_or_none}
+            text = await asyncio.wrap_future(finish_live_session(session_id))
+            return {"answer": text}
         else:
-            return {"ok": True}
+            return {"ok": True, "partial": text}
+    except LiveSessionLimitError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": str(e)})
+    except PoolBusyError as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.exception("transcribe-stream error")
         return JSONResponse(status_code=500, content={"error": str(e)})
+
+@router.get("/transcribe-models")
+def transcribe_models():
+    """Whisper models currently loaded in the pool and their memory use."""
+    return whisper_pool.stats()
+
+@router.get("/transcribe-sessions")
+def transcribe_sessions():
+    """Live transcription sessions currently held and their buffered audio."""
+    return live_session_stats()
@@ -1,12 +1,132 @@
+import asyncio
+import json
+from typing import List
+import httpx
+import requests
 from fastapi import APIRouter, Form
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from ..core.logger import logger
+from ..core.config import OLLAMA_TEXT_MODEL, FILE_CHAT_TOP_K, URL_INGEST_CONCURRENCY
+from ..core.url_fetcher import fetch_url, save_cached
+from ..core.rag_engine import add_document_to_index, remove_source_from_index
+from ..core.file_cache import get_entry, build_entry, top_chunks
+from ..core.model_selector import select_model
+from ..core.llm_gate import LLMBusyError, PRIORITY_INTERACTIVE
+from ..core.executors import run_in_pool, run_in_pool_when_free, PoolBusyError
+from ..core.ollama_client import ChatStream
+from ..core.llm_response import LLMStreamingResponse
 
 router = APIRouter()
 
+class UrlIngest(BaseModel):
+    urls: List[str]
+    index: bool = True
+
+
+def _index_record(record):
+    """Add a fetched page to the KB unless this exact content is already indexed."""
+    if record.get("indexed"):
+        return 0
+    if record.get("stale_indexed"):
+        # the page changed since it was indexed: drop the old version's chunks first
+        remove_source_from_index(record["url"])
+        record["stale_indexed"] = False
+    added = add_document_to_index(record["url"], record["text"], meta={"url": record["url"], "content_hash": record["content_hash"]})
+    record["indexed"] = True
+    save_cached(record["url"], {k: v for k, v in record.items() if k != "changed"})
+    return added
+
+
+def _ephemeral_entry(record):
+    return get_entry(record["content_hash"]) or build_entry(record["content_hash"], record["text"], name=record["url"])
+
+
 @router.post("/url-chat")
-def url_chat(url: str = Form(...), question: str = Form(...)):
+async def url_chat(url: str = Form(...), question: str = Form(...), index: bool = Form(False)):
+    """
+    Fetch a URL (conditional GET, cached) and chat with its content.
+    index=True also adds the page to the knowledge base; otherwise it only lives
+    in the ephemeral per-content index shared with file-chat.
+    """
+    try:
+        record = await fetch_url(url)
+        if not record["text"].strip():
+            return JSONResponse(status_code=200, content={"answer": "⚠️ Could not extract text from the page."})
+
+        if index:
+            await run_in_pool("embed", _index_record, record)
+        entry = await run_in_pool("embed", _ephemeral_entry, record)
+        chunks = await run_in_pool("embed", top_chunks, entry, question, FILE_CHAT_TOP_K)
+        context = "\n\n".join(chunks)
+
+        prompt = (
+            "You are an AI assistant. Use the web page content below to answer the question.\n\n"
+            f"PAGE ({url}):\n{context}\n\n"
+            f"QUESTION: {question}\n\n"
+            "Answer based ONLY on the page."
+        )
+        model = select_model("text") or OLLAMA_TEXT_MODEL
+        meta = {"route": "url-chat", "message": question}
+        stream = await run_in_threadpool(ChatStream, model, [{"role": "user", "content": prompt}], PRIORITY_INTERACTIVE, meta=meta)
+
+        def event_gen():
+            try:
+                for token in stream:
+                    yield f"data: {json.dumps({'content': token}, ensure_ascii=False)}\n\n"
+                yield "data: {\"content\": \"\"}\n\n"
+            except Exception as e:
+                logger.exception("Streaming error from Ollama")
+                yield f"data: {json.dumps({'content': '[ERROR] ' + str(e)})}\n\n"
+
+        return LLMStreamingResponse(
+            event_gen(),
+            stream,
+            media_type="text/event-stream",
+            headers={"X-Content-Hash": record["content_hash"], "X-Request-ID": stream.request_id},
+        )
+
+    except (LLMBusyError, PoolBusyError) as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": str(e.retry_after)})
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning("url_chat fetch failed for %s: %s", url, e)
+        return JSONResponse(status_code=400, content={"error": f"Could not fetch URL: {e}"})
+    except requests.exceptions.RequestException as e:
+        logger.exception("Ollama connection failed")
+        return JSONResponse(status_code=502, content={"error": f"Ollama connection failed: {str(e)}"})
+    except Exception as e:
+        logger.exception("url_chat error")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@router.post("/url-ingest")
+async def url_ingest(payload: UrlIngest):
     """
-    Placeholder for URL ingestion + chat. (Future enhancement)
+    Fetch many URLs concurrently (at most URL_INGEST_CONCURRENCY in flight, bounded
+    per host) and index them into the KB (index=True) or the ephemeral index.
+    Unchanged pages are not re-embedded. Embedding waits for room on the embed
+    pool rather than failing when it is busy.
     """
-    logger.info("url_chat called for %s", url)
-    return {"ok": False, "message": "url_chat not implemented yet. (Future enhancement)"}
+    in_flight = asyncio.Semaphore(max(1, URL_INGEST_CONCURRENCY))
+
+    async def one(url):
+        async with in_flight:
+            return await _ingest_one(url)
+
+    async def _ingest_one(url):
+        try:
+            record = await fetch_url(url)
+            if not record["text"].strip():
+                return {"url": url, "ok": False, "error": "No text extracted."}
+            if payload.index:
+                added = await run_in_pool_when_free("embed", _index_record, record)
+            else:
+                added = len((await run_in_pool_when_free("embed", _ephemeral_entry, record))["chunks"])
+            return {"url": url, "ok": True, "changed": record["changed"], "added_chunks": added, "content_hash": record["content_hash"]}
+        except Exception as e:
+            logger.warning("url-ingest failed for %s: %s", url, e)
+            return {"url": url, "ok": False, "error": str(e)}
+
+    results = await asyncio.gather(*(one(u) for u in payload.urls))
+    return {"ok": True, "results": results}
@@ -0,0 +1,203 @@
+"""
+Retrieval and ingestion benchmark for EmbeddingManager.
+
+Runs offline: the corpus is synthetic (Zipf-distributed vocabulary, seeded)
+and the text embedder is replaced by a hashing stub, so only the index, BM25,
+chunk store and persistence code is measured. Results are written as JSON so
+runs can be compared (--compare old.json).
+
+    python -m benchmarks.bench_retrieval --chunks 10000 --queries 200 --out results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+
+# must be set before backend.core.config is imported
+_WORKDIR = tempfile.mkdtemp(prefix="rag-bench-")
+os.environ["EMBEDDINGS_DIR"] = _WORKDIR
+os.environ.setdefault("EMBED_BATCHING", "false")
+os.environ.setdefault("ENCODE_PROCESSES", "1")
+os.environ.setdefault("WARMUP_MODELS", "false")
+
+import numpy as np
+import psutil
+
+from backend.core import embedding_manager as em
+
+
+class StubEmbedder:
+    """Feature-hashing embedder with the SentenceTransformer.encode signature."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True, **kwargs):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.split():
+                h = zlib.crc32(token.encode("utf-8"))
+                out[row, h % self.dim] += 1.0 if (h >> 20) & 1 else -1.0
+        if normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out
+
+
+def make_vocab(size, rng):
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    lengths = rng.integers(3, 10, size=size)
+    return ["".join(rng.choice(letters, n)) for n in lengths]
+
+
+def generate_chunks(n_chunks, words_per_chunk, vocab, rng, batch=10000):
+    """Yield lists of synthetic chunks (Zipf word frequencies) in batches."""
+    vocab = np.array(vocab)
+    for start in range(0, n_chunks, batch):
+        n = min(batch, n_chunks - start)
+        ids = (rng.zipf(1.2, size=(n, words_per_chunk)) - 1) % len(vocab)
+        yield [" ".join(row) for row in vocab[ids]]
+
+
+def percentiles(samples):
+    arr = np.array(samples) * 1000.0
+    return {
+        "n": len(samples),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "mean_ms": float(arr.mean()),
+    }
+
+
+def rss_mb():
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def new_manager(embedder):
+    return em.EmbeddingManager(text_model=embedder)
+
+
+def bench_ingest(manager, args, vocab, rng):
+    """Bulk-add chunks in batches (embed, commit, one BM25 build), then write one checkpoint."""
+    started = time.perf_counter()
+    manager.add_chunk_batches("bench", generate_chunks(args.chunks, args.words, vocab, rng, args.batch), meta={"bench": True})
+    ingest_s = time.perf_counter() - started
+    started = time.perf_counter()
+    manager.checkpoint(force=True)
+    persist_s = time.perf_counter() - started
+    total = ingest_s + persist_s
+    return {
+        "ingest_s": ingest_s,
+        "persist_s": persist_s,
+        "total_s": total,
+        "chunks_per_s": args.chunks / total if total else 0.0,
+        "ingest_chunks_per_s": args.chunks / ingest_s if ingest_s else 0.0,
+    }
+
+
+def bench_search(manager, queries, k):
+    results = {}
+    for name in ("search_dense", "search_sparse", "hybrid_search"):
+        fn = getattr(manager, name)
+        for q in queries[:5]:
+            fn(q + " warmup", k=k)  # first-call costs
+        manager.clear_embedding_cache()  # each method starts with a cold query-embedding cache
+        samples = []
+        for q in queries:
+            started = time.perf_counter()
+            fn(q, k=k)
+            samples.append(time.perf_counter() - started)
+        results[name] = percentiles(samples)
+    return results
+
+
+def disk_usage():
+    sizes = {}
+    for name in sorted(os.listdir(em.EMBEDDINGS_DIR)):
+        path = os.path.join(em.EMBEDDINGS_DIR, name)
+        if os.path.isfile(path):
+            sizes[name] = os.path.getsize(path) / (1024 * 1024)
+    return sizes
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = [("ingest.chunks_per_s", current["ingest"]["chunks_per_s"], baseline["ingest"]["chunks_per_s"])]
+    for name, stats in current["search"].items():
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            rows.append((f"search.{name}.{key}", stats[key], baseline["search"].get(name, {}).get(key)))
+    rows.append(("load.load_s", current["load"]["load_s"], baseline["load"]["load_s"]))
+    rows.append(("memory.rss_after_ingest_mb", current["memory"]["rss_after_ingest_mb"], baseline["memory"]["rss_after_ingest_mb"]))
+    for metric, now, before in rows:
+        delta = f"{(now - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"{metric:40s} {before if before is not None else 'n/a':>12} -> {now:>12.3f}  {delta}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=10000, help="synthetic chunks to ingest (10k .. 10M)")
+    parser.add_argument("--words", type=int, default=120, help="words per chunk")
+    parser.add_argument("--vocab", type=int, default=50000, help="vocabulary size")
+    parser.add_argument("--batch", type=int, default=10000, help="chunks per ingest call")
+    parser.add_argument("--queries", type=int, default=200, help="queries per search method")
+    parser.add_argument("--query-words", type=int, default=6)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=384, help="stub embedding dimension")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON to print deltas against")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary index directory")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    vocab = make_vocab(args.vocab, rng)
+    embedder = StubEmbedder(args.dim)
+
+    rss_start = rss_mb()
+    manager = new_manager(embedder)
+    ingest = bench_ingest(manager, args, vocab, rng)
+    rss_ingest = rss_mb()
+
+    queries = next(generate_chunks(args.queries, args.query_words, vocab, rng, args.queries))
+    search = bench_search(manager, queries, args.k)
+    del manager
+
+    started = time.perf_counter()
+    reloaded = new_manager(embedder)
+    load_s = time.perf_counter() - started
+    assert len(reloaded.chunk_store) == args.chunks
+
+    results = {
+        "config": vars(args),
+        "env": {"python": sys.version.split()[0], "platform": platform.platform(), "cpus": os.cpu_count()},
+        "ingest": ingest,
+        "search": search,
+        "load": {"load_s": load_s},
+        "memory": {
+            "rss_start_mb": rss_start,
+            "rss_after_ingest_mb": rss_ingest,
+            "ingest_delta_mb": rss_ingest - rss_start,
+            "rss_after_load_mb": rss_mb(),
+            "disk_mb": disk_usage(),
+        },
+    }
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        compare(results, args.compare)
+    if not args.keep:
+        shutil.rmtree(_WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
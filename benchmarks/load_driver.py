@@ -0,0 +1,237 @@
+"""
+Concurrent load driver for the streaming routes.
+
+Opens --concurrency parallel sessions against a running backend, split over
+/api/chat-stream, /api/file-chat and /api/auto-summarize by --mix. Each run
+reports throughput, time-to-first-token, end-to-end latency (p50/p95/p99),
+streamed tokens/sec, and errors by status as JSON. Point the backend at
+benchmarks.ollama_stub to measure the FastAPI layer without a real model.
+
+    python -m benchmarks.load_driver --concurrency 64 --duration 60 --mix chat-stream=2,file-chat=1,auto-summarize=1
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+import httpx
+import numpy as np
+
+QUESTIONS = [
+    "What are the main points of the document?",
+    "Summarize the key findings in two sentences.",
+    "Which risks are mentioned and how are they mitigated?",
+    "List the action items with their owners.",
+]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def synthetic_document(n_paragraphs=40, seed=0):
+    rng = random.Random(seed)
+    words = "system latency throughput index query model token cache worker budget report risk owner".split()
+    return "\n\n".join(" ".join(rng.choice(words) for _ in range(80)) for _ in range(n_paragraphs))
+
+
+class Result:
+    __slots__ = ("scenario", "status", "started", "ttft", "latency", "tokens", "error")
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.status = None
+        self.started = time.perf_counter()
+        self.ttft = None
+        self.latency = None
+        self.tokens = 0
+        self.error = None
+
+
+async def _consume_sse(resp, result, field):
+    async for line in resp.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        try:
+            obj = json.loads(line[5:].strip())
+        except ValueError:
+            continue
+        if obj.get("error"):
+            result.error = obj["error"]
+            continue
+        text = obj.get(field)
+        if text:
+            if result.ttft is None:
+                result.ttft = time.perf_counter() - result.started
+            if text.startswith("[ERROR]"):
+                result.error = text
+            result.tokens += 1
+
+
+async def run_chat_stream(client, args, state):
+    result = Result("chat-stream")
+    async with client.stream("POST", "/api/chat-stream", json={"question": random.choice(QUESTIONS)}) as resp:
+        result.status = resp.status_code
+        if resp.status_code == 200:
+            await _consume_sse(resp, result, "token")
+        else:
+            await resp.aread()
+    return result
+
+
+async def run_file_chat(client, args, state):
+    result = Result("file-chat")
+    data = {"question": random.choice(QUESTIONS)}
+    files = None
+    # re-upload every --upload-every requests (and until a hash is known); otherwise ask by hash
+    state["file_chat_requests"] += 1
+    if state.get("file_hash") and state["file_chat_requests"] % args.upload_every:
+        data["file_hash"] = state["file_hash"]
+    else:
+        files = {"file": ("load-test.txt", state["document"], "text/plain")}
+    async with client.stream("POST", "/api/file-chat", data=data, files=files) as resp:
+        result.status = resp.status_code
+        if resp.status_code == 200:
+            state["file_hash"] = resp.headers.get("x-file-hash") or state.get("file_hash")
+            await _consume_sse(resp, result, "content")
+        else:
+            if resp.status_code == 404:
+                state["file_hash"] = None
+            await resp.aread()
+    return result
+
+
+async def run_auto_summarize(client, args, state):
+    result = Result("auto-summarize")
+    data = {"query": random.choice(QUESTIONS), "mode": args.summarize_mode}
+    if args.summarize_source:
+        data["source"] = args.summarize_source
+    if args.summarize_mode == "hierarchical":
+        async with client.stream("POST", "/api/auto-summarize", data=data) as resp:
+            result.status = resp.status_code
+            if resp.status_code == 200:
+                await _consume_sse(resp, result, "token")
+            else:
+                await resp.aread()
+    else:
+        resp = await client.post("/api/auto-summarize", data=data)
+        result.status = resp.status_code
+        body = resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {}
+        if body.get("error"):
+            result.error = body["error"]
+        elif resp.status_code == 200:
+            result.ttft = time.perf_counter() - result.started
+            result.tokens = len(body.get("answer", "").split())
+    return result
+
+
+SCENARIOS = {
+    "chat-stream": run_chat_stream,
+    "file-chat": run_file_chat,
+    "auto-summarize": run_auto_summarize,
+}
+
+
+async def worker(client, args, mix, state, deadline, results):
+    names, weights = zip(*mix.items())
+    while time.perf_counter() < deadline and state["remaining"] != 0:
+        if state["remaining"] > 0:
+            state["remaining"] -= 1
+        name = random.choices(names, weights)[0]
+        try:
+            result = await SCENARIOS[name](client, args, state)
+        except Exception as e:
+            result = Result(name)
+            result.error = f"{type(e).__name__}: {e}"
+        result.latency = time.perf_counter() - result.started
+        results.append(result)
+
+
+def _percentiles(values):
+    if not values:
+        return None
+    arr = np.array(values) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "max_ms": float(arr.max()),
+    }
+
+
+def summarize(results, elapsed):
+    by_scenario = defaultdict(list)
+    for r in results:
+        by_scenario[r.scenario].append(r)
+    report = {}
+    for name, rs in sorted(by_scenario.items()):
+        ok = [r for r in rs if r.status == 200 and not r.error]
+        statuses = Counter(str(r.status) if r.status else "exception" for r in rs if r.status != 200 or r.error)
+        tokens = sum(r.tokens for r in ok)
+        report[name] = {
+            "requests": len(rs),
+            "ok": len(ok),
+            "errors": dict(statuses),
+            "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+            "ttft": _percentiles([r.ttft for r in ok if r.ttft is not None]),
+            "latency": _percentiles([r.latency for r in ok]),
+            "tokens_per_s": tokens / elapsed if elapsed else 0.0,
+        }
+    return report
+
+
+async def run(args):
+    mix = parse_mix(args.mix)
+    state = {"document": synthetic_document(seed=args.seed).encode("utf-8"), "file_chat_requests": 0,
+             "remaining": args.requests or -1}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout, connect=10.0)
+    results = []
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(client, args, mix, state, deadline, results) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    return {
+        "config": vars(args),
+        "elapsed_s": elapsed,
+        "total_requests": len(results),
+        "scenarios": summarize(results, elapsed),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel sessions")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0 = duration only)")
+    parser.add_argument("--mix", default="chat-stream=1,file-chat=1,auto-summarize=1", help="scenario weights")
+    parser.add_argument("--upload-every", type=int, default=20, help="file-chat re-uploads the file every N requests")
+    parser.add_argument("--summarize-mode", choices=("simple", "hierarchical"), default="simple")
+    parser.add_argument("--summarize-source", help="source name for hierarchical summaries")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+    random.seed(args.seed)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
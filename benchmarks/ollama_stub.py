@@ -0,0 +1,161 @@
+"""
+Ollama-compatible stand-in for load testing (no model, no GPU).
+
+Implements /api/chat and /api/generate (streaming NDJSON and non-streaming),
+/api/tags and /api/version. Timing and failures are configurable:
+time-to-first-token, tokens/sec, response length, jitter, and the share of
+requests that fail up front (HTTP 500) or are cut off mid-stream.
+
+    python -m benchmarks.ollama_stub --port 11435 --ttft-ms 300 --tokens-per-sec 40
+    OLLAMA_PORT=11435 uvicorn backend.app:app --workers 1
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = ("the quick brown fox jumps over a lazy dog while the model streams "
+         "tokens back to the client at a steady configurable pace").split()
+
+app = FastAPI()
+settings = argparse.Namespace(
+    ttft_ms=200.0, tokens_per_sec=50.0, tokens=128, jitter=0.1, error_rate=0.0, midstream_error_rate=0.0,
+)
+counters = {"requests": 0, "errors": 0, "midstream_errors": 0, "active": 0}
+
+
+def _jittered(seconds):
+    return max(0.0, seconds * (1 + random.uniform(-settings.jitter, settings.jitter)))
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _final(model, prompt_tokens, started, first_token_at, chat):
+    now = time.perf_counter()
+    body = {
+        "model": model,
+        "created_at": _now(),
+        "done": True,
+        "done_reason": "stop",
+        "total_duration": int((now - started) * 1e9),
+        "load_duration": 0,
+        "prompt_eval_count": prompt_tokens,
+        "prompt_eval_duration": int((first_token_at - started) * 1e9),
+        "eval_count": settings.tokens,
+        "eval_duration": int((now - first_token_at) * 1e9),
+    }
+    if chat:
+        body["message"] = {"role": "assistant", "content": ""}
+    else:
+        body["response"] = ""
+    return body
+
+
+async def _respond(request, chat):
+    payload = await request.json()
+    model = payload.get("model", "stub")
+    if chat:
+        prompt = " ".join(m.get("content", "") for m in payload.get("messages", []))
+    else:
+        prompt = payload.get("prompt", "")
+    prompt_tokens = len(prompt.split())
+    counters["requests"] += 1
+
+    if random.random() < settings.error_rate:
+        counters["errors"] += 1
+        return JSONResponse(status_code=500, content={"error": "injected failure"})
+
+    started = time.perf_counter()
+    delay = 1.0 / settings.tokens_per_sec if settings.tokens_per_sec > 0 else 0.0
+    cut_at = random.randint(1, settings.tokens) if random.random() < settings.midstream_error_rate else None
+
+    def piece(i):
+        word = WORDS[i % len(WORDS)] + " "
+        if chat:
+            return {"model": model, "created_at": _now(), "message": {"role": "assistant", "content": word}, "done": False}
+        return {"model": model, "created_at": _now(), "response": word, "done": False}
+
+    if not payload.get("stream", True):
+        await asyncio.sleep(_jittered(settings.ttft_ms / 1000.0) + settings.tokens * delay)
+        first = started + settings.ttft_ms / 1000.0
+        body = _final(model, prompt_tokens, started, first, chat)
+        text = "".join(WORDS[i % len(WORDS)] + " " for i in range(settings.tokens))
+        if chat:
+            body["message"]["content"] = text
+        else:
+            body["response"] = text
+        return body
+
+    async def gen():
+        counters["active"] += 1
+        try:
+            await asyncio.sleep(_jittered(settings.ttft_ms / 1000.0))
+            first_token_at = time.perf_counter()
+            for i in range(settings.tokens):
+                if cut_at is not None and i == cut_at:
+                    counters["midstream_errors"] += 1
+                    raise RuntimeError("injected mid-stream failure")
+                yield json.dumps(piece(i)) + "\n"
+                if delay:
+                    await asyncio.sleep(_jittered(delay))
+            yield json.dumps(_final(model, prompt_tokens, started, first_token_at, chat)) + "\n"
+        finally:
+            counters["active"] -= 1
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
+
+
+@app.post("/api/chat")
+async def chat(request: Request):
+    return await _respond(request, chat=True)
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    return await _respond(request, chat=False)
+
+
+@app.get("/api/tags")
+def tags():
+    return {"models": [{"name": "llama3:latest", "model": "llama3:latest", "modified_at": _now(), "size": 0}]}
+
+
+@app.get("/api/version")
+def version():
+    return {"version": "0.0.0-stub"}
+
+
+@app.get("/stub/stats")
+def stats():
+    return {**counters, "settings": vars(settings)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft-ms", type=float, default=settings.ttft_ms, help="time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=settings.tokens_per_sec, help="0 = as fast as possible")
+    parser.add_argument("--tokens", type=int, default=settings.tokens, help="tokens per response")
+    parser.add_argument("--jitter", type=float, default=settings.jitter, help="relative +/- jitter on delays")
+    parser.add_argument("--error-rate", type=float, default=settings.error_rate, help="share of requests answered with 500")
+    parser.add_argument("--midstream-error-rate", type=float, default=settings.midstream_error_rate,
+                        help="share of streams cut off before completion")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    for key in vars(settings):
+        setattr(settings, key, getattr(args, key))
+    if args.seed is not None:
+        random.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
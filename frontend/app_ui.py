@@ -5,6 +5,7 @@ import json
 import time
 import base64
 import uuid
+import hashlib
 
 # -----------------------------
 # Page Configuration
@@ -192,9 +193,14 @@ with tab1:
             if kb_files:
                 files = {"file": (kb_files.name, kb_files.getvalue())}
                 data = {"question": question, "session_id": st.session_state.session_id}
+                # the server keys its cache by the same sha256 of the file bytes
+                file_hash = hashlib.sha256(kb_files.getvalue()).hexdigest()
                 try:
                     with st.spinner("Processing and generating answer..."):
-                        resp = requests.post(f"{API_PREFIX}/file-chat", files=files, data=data, stream=True, timeout=300)
+                        # reuse the server-side cached index; upload only if it is unknown or expired
+                        resp = requests.post(f"{API_PREFIX}/file-chat", data={**data, "file_hash": file_hash}, stream=True, timeout=300)
+                        if resp.status_code == 404:
+                            resp = requests.post(f"{API_PREFIX}/file-chat", files=files, data=data, stream=True, timeout=300)
                     if resp.status_code == 200:
                         full = ""
                         answer_box = st.empty()
@@ -222,7 +228,7 @@ with tab1:
                 try:
                     with st.spinner("Getting response..."):
                         url = f"{API_PREFIX}/chat-stream"
-                        with requests.post(url, json={"question": question}, stream=True, timeout=300) as r:
+                        with requests.post(url, json={"question": question, "session_id": st.session_state.session_id}, stream=True, timeout=300) as r:
                             if r.status_code != 200:
                                 st.error(f"❌ Streaming endpoint error {r.status_code}: {r.text}")
                             else:
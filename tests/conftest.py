@@ -0,0 +1,18 @@
+"""
+Shared test setup. Data, index and log paths point at a temporary directory
+before backend.core.config is imported, so tests never touch ./data or ./logs.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_TMP = tempfile.mkdtemp(prefix="rag-tests-")
+for _name, _sub in (("UPLOAD_DIR", "uploads"), ("EMBEDDINGS_DIR", "embeddings"), ("LOG_DIR", "logs")):
+    os.environ.setdefault(_name, os.path.join(_TMP, _sub))
+os.environ.setdefault("DB_PATH", os.path.join(_TMP, "app.db"))
+os.environ.setdefault("EMBED_BATCHING", "false")
+os.environ.setdefault("ENCODE_PROCESSES", "1")
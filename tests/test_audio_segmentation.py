@@ -0,0 +1,44 @@
+import numpy as np
+
+from backend.core.audio_transcriber import split_on_silence
+
+SR = 1000
+
+
+def _speech_with_pauses(seconds, pauses, seed=0):
+    """White noise with 0.5 s of silence starting at each of `pauses` (seconds)."""
+    rng = np.random.default_rng(seed)
+    audio = rng.uniform(-0.5, 0.5, int(seconds * SR)).astype(np.float32)
+    for p in pauses:
+        audio[int(p * SR):int((p + 0.5) * SR)] = 0.0
+    return audio
+
+
+def test_empty_and_short_audio():
+    assert split_on_silence(np.zeros(0, dtype=np.float32), sr=SR) == []
+    short = np.ones(10, dtype=np.float32)
+    assert split_on_silence(short, sr=SR) == [(0, 10)]
+    assert split_on_silence(np.ones(5 * SR, dtype=np.float32), sr=SR, target_s=10, max_s=20) == [(0, 5 * SR)]
+
+
+def test_cuts_land_in_pauses():
+    pauses = [12, 27, 41]
+    audio = _speech_with_pauses(50, pauses)
+    bounds = split_on_silence(audio, sr=SR, target_s=10, max_s=20)
+
+    assert len(bounds) == len(pauses) + 1
+    for (start, end), pause in zip(bounds, pauses):
+        assert pause * SR <= end <= (pause + 0.5) * SR
+        assert np.all(audio[end:end + 10] == 0)
+
+
+def test_bounds_are_contiguous_and_capped():
+    # no pauses at all: cuts still happen, segments stay within max_s
+    audio = _speech_with_pauses(95, [], seed=1)
+    bounds = split_on_silence(audio, sr=SR, target_s=10, max_s=20)
+
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(audio)
+    for (_, end), (start, _) in zip(bounds, bounds[1:]):
+        assert end == start
+    for start, end in bounds[:-1]:
+        assert 5 * SR - 30 <= end - start <= 20 * SR
@@ -0,0 +1,124 @@
+import os
+import zlib
+
+import numpy as np
+import pytest
+
+from backend.core import embedding_manager as em
+from backend.core import index_compactor, index_store
+from backend.core.config import EMBEDDINGS_DIR
+
+
+class StubEncoder:
+    """Feature-hashing stand-in for SentenceTransformer (no torch)."""
+
+    dim = 32
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True, **kwargs):
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for i, text in enumerate(texts):
+            for word in text.split():
+                out[i, zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+def _clear():
+    for name in os.listdir(EMBEDDINGS_DIR):
+        path = os.path.join(EMBEDDINGS_DIR, name)
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+@pytest.fixture(autouse=True)
+def index_dir(monkeypatch):
+    _clear()
+    monkeypatch.setattr(em, "_manager", None)
+    yield
+    _clear()
+
+
+def new_manager():
+    return em.EmbeddingManager(text_model=StubEncoder())
+
+
+def test_checkpoint_writes_generations_that_reload(caplog):
+    m = new_manager()
+    m.add_chunks("a", ["alpha beta", "gamma delta"])
+    assert m._dirty == 2
+    first = m.checkpoint()
+    assert first["generation"] == 1 and m._dirty == 0
+    assert m.checkpoint() is None  # nothing pending
+
+    m.add_chunks("b", ["epsilon zeta"])
+    assert m.checkpoint()["generation"] == 2
+    assert index_store.read_manifest()["generation"] == 2
+    # the second checkpoint extended generation 1's file instead of copying the live index
+    assert "copying the full index" not in caplog.text
+
+    reloaded = new_manager()
+    assert reloaded.generation == 2
+    assert [c["text"] for c in reloaded.chunk_store] == ["alpha beta", "gamma delta", "epsilon zeta"]
+    assert reloaded.text_index.ntotal == 3
+    np.testing.assert_allclose(reloaded.text_index.reconstruct_n(0, 3), m.text_index.reconstruct_n(0, 3))
+
+
+def test_tombstoned_sources_are_skipped_by_every_search():
+    m = new_manager()
+    m.add_chunks("gone", ["needle needle needle", "needle haystack"])
+    m.add_chunks("kept", ["needle other words", "unrelated text"])
+    assert m.delete_source("gone") == 2
+
+    dense = m.search_dense("needle needle needle", k=2)
+    assert len(dense) == 2  # over-fetch still returns k live hits
+    assert all(hit["chunk"]["source"] == "kept" for hit in dense)
+    assert all(hit["chunk"]["source"] == "kept" for hit in m.search_sparse("needle", k=2))
+    assert m.chunks_for_source("gone") == []
+
+    m.checkpoint()
+    assert new_manager().tombstones == {0, 1}
+
+
+def test_checkpoint_refuses_to_overwrite_a_newer_generation():
+    a = new_manager()
+    a.add_chunks("a", ["from writer a"])
+    a.checkpoint()
+    b = new_manager()
+    b.add_chunks("b", ["from writer b"])
+    assert b.checkpoint()["generation"] == 2
+
+    a.add_chunks("a2", ["more from a"])
+    assert a.checkpoint() is None
+    manifest = index_store.read_manifest()
+    assert manifest["generation"] == 2
+    assert [c["source"] for c in index_store.load_generation(manifest)[0]] == ["a", "b"]
+
+
+def test_compaction_is_hot_reloaded_with_later_commits_replayed(monkeypatch):
+    m = new_manager()
+    monkeypatch.setattr(em, "_manager", m)
+    m.add_chunks("old", ["drop me", "drop me too"])
+    m.add_chunks("doc", ["keep this text"])
+    m.delete_source("old")
+    m.checkpoint()
+
+    summary = index_compactor.compact()
+    assert summary["compacted"] and summary["kept"] == 1 and summary["new_generation"] == 2
+
+    # committed after the compactor read generation 1
+    m.add_chunks("late", ["late arrival"])
+    m.delete_source("doc")
+    manifest = em.checkpoint_cycle()
+
+    new = em.get_manager()
+    assert new is not m and m._retired
+    assert manifest["generation"] == 3
+    assert [(c["id"], c["source"]) for c in new.chunk_store] == [(0, "doc"), (1, "late")]
+    assert new.tombstones == {0}
+    assert new.text_index.ntotal == 2
+    assert [h["chunk"]["source"] for h in new.search_dense("late arrival", k=1)] == ["late"]
+
+    # writers still holding the old manager are forwarded to the new one
+    m.add_chunks("forwarded", ["via retired manager"])
+    assert new.chunk_store[-1]["source"] == "forwarded"
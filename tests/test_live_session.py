@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from backend.core import audio_transcriber as at
+
+SR = at.SAMPLE_RATE
+WINDOW = at.LIVE_WINDOW_SECONDS
+CUT = max(1.0, at.LIVE_WINDOW_SECONDS - at.LIVE_OVERLAP_SECONDS)
+
+
+class _FakeWhisper:
+    """
+    Stands in for whisper_pool. Audio samples carry their own absolute index, so
+    each call knows which part of the stream it was given; the stream is a run of
+    fixed-length "words" and every word starting inside the window is returned,
+    with its end clipped to the window like Whisper does.
+    """
+
+    def __init__(self, word_s):
+        self.word_s = word_s
+        self.calls = []
+
+    def transcribe(self, size, audio, **options):
+        start = int(audio[0]) / SR
+        length = len(audio) / SR
+        self.calls.append((start, length))
+        segments = []
+        k = int(np.ceil(start / self.word_s - 1e-9))
+        while k * self.word_s < start + length:
+            seg_start = k * self.word_s - start
+            seg_end = min((k + 1) * self.word_s - start, length)
+            segments.append({"start": seg_start, "end": seg_end, "text": f" w{k} "})
+            k += 1
+        return {"segments": segments}
+
+
+def _stream(seconds):
+    return np.arange(int(seconds * SR), dtype=np.float32)
+
+
+def _feed(sess, audio, step_s=5):
+    step = int(step_s * SR)
+    for i in range(0, len(audio), step):
+        sess.pcm = np.concatenate([sess.pcm, audio[i:i + step]])
+        sess.process_windows()
+    sess.process_windows(final=True)
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    def install(word_s):
+        fake = _FakeWhisper(word_s)
+        monkeypatch.setattr(at, "whisper_pool", fake)
+        return fake
+    return install
+
+
+def test_each_word_committed_once(fake_whisper):
+    fake = fake_whisper(word_s=4)
+    sess = at._LiveSession("tiny")
+    _feed(sess, _stream(61))
+
+    assert sess.transcript().split() == [f"w{k}" for k in range(16)]
+    assert len(sess.pcm) == 0 and sess.offset == 61 * SR
+    # windows advance by whole words ending before the cut
+    assert all(length <= WINDOW for _, length in fake.calls)
+
+
+def test_straddling_words_are_not_repeated(fake_whisper):
+    # every word is longer than the cut, so no segment ever ends before it
+    fake = fake_whisper(word_s=CUT + 5)
+    sess = at._LiveSession("tiny")
+    _feed(sess, _stream(90))
+
+    words = sess.transcript().split()
+    assert len(words) == len(set(words))
+    # the straddling word is consumed through its (clipped) end, not just to the cut
+    assert [start for start, _ in fake.calls] == [k * WINDOW for k in range(len(fake.calls))]
+    assert sess.offset == 90 * SR
+
+
+def test_zero_length_segments_still_advance(monkeypatch):
+    calls = []
+
+    class _Silent:
+        def transcribe(self, size, audio, **options):
+            calls.append(len(audio))
+            return {"segments": [{"start": 0.0, "end": 0.0, "text": ""}]}
+
+    monkeypatch.setattr(at, "whisper_pool", _Silent())
+    sess = at._LiveSession("tiny")
+    sess.pcm = _stream(2 * WINDOW)
+    sess.process_windows()
+
+    # each pass consumes at least up to the cut instead of spinning on the same window
+    assert sess.offset >= int(CUT * SR)
+    assert len(calls) <= int(2 * WINDOW / CUT) + 1
+    assert len(sess.pcm) < WINDOW * SR
+
+
+def test_partial_window_waits_until_final(fake_whisper):
+    fake = fake_whisper(word_s=4)
+    sess = at._LiveSession("tiny")
+    sess.pcm = _stream(WINDOW / 2)
+    sess.process_windows()
+    assert fake.calls == [] and sess.offset == 0
+
+    sess.process_windows(final=True)
+    assert len(fake.calls) == 1
+    assert sess.offset == int(WINDOW / 2 * SR) and len(sess.pcm) == 0
+    assert sess.transcript().split()[0] == "w0"
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from backend.core.llm_gate import LLMBusyError, LLMGate, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+
+def _wait_for_queue(gate, depth, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while gate.stats()["queue_depth"] < depth:
+        assert time.monotonic() < deadline, "waiters never queued"
+        time.sleep(0.005)
+
+
+def test_admits_up_to_max_concurrency():
+    gate = LLMGate(max_concurrency=2, max_queue=4, queue_timeout=0.05)
+    a, b = gate.acquire(), gate.acquire()
+    assert gate.stats()["active"] == 2
+    with pytest.raises(LLMBusyError):
+        gate.acquire()
+    a.release()
+    a.release()  # idempotent: must not free a second slot
+    assert gate.stats()["active"] == 1
+    gate.acquire().release()
+    b.release()
+    assert gate.stats()["active"] == 0
+
+
+def test_full_queue_rejects_immediately():
+    gate = LLMGate(max_concurrency=1, max_queue=1, queue_timeout=5)
+    held = gate.acquire()
+    waiter = threading.Thread(target=lambda: gate.acquire().release())
+    waiter.start()
+    _wait_for_queue(gate, 1)
+
+    started = time.monotonic()
+    with pytest.raises(LLMBusyError) as exc:
+        gate.acquire()
+    assert time.monotonic() - started < 1
+    assert exc.value.retry_after > 0
+    assert gate.stats()["rejected"] == 1
+
+    held.release()
+    waiter.join(2)
+    assert gate.stats()["active"] == 0
+
+
+def test_timeout_leaves_queue_clean():
+    gate = LLMGate(max_concurrency=1, max_queue=4, queue_timeout=0.05)
+    held = gate.acquire()
+    with pytest.raises(LLMBusyError):
+        gate.acquire()
+    stats = gate.stats()
+    assert stats["timed_out"] == 1 and stats["queue_depth"] == 0
+    held.release()
+    with gate.slot():
+        assert gate.stats()["active"] == 1
+    assert gate.stats()["active"] == 0
+
+
+def test_waiters_served_by_priority_then_arrival():
+    gate = LLMGate(max_concurrency=1, max_queue=8, queue_timeout=5)
+    held = gate.acquire()
+    order = []
+
+    def worker(label, priority):
+        with gate.slot(priority):
+            order.append(label)
+
+    threads = []
+    for label, priority in (("bg-1", PRIORITY_BACKGROUND), ("ui-1", PRIORITY_INTERACTIVE),
+                            ("bg-2", PRIORITY_BACKGROUND), ("ui-2", PRIORITY_INTERACTIVE)):
+        t = threading.Thread(target=worker, args=(label, priority))
+        t.start()
+        threads.append(t)
+        # queue them one at a time so arrival order is deterministic
+        _wait_for_queue(gate, len(threads))
+
+    held.release()
+    for t in threads:
+        t.join(2)
+    assert order == ["ui-1", "ui-2", "bg-1", "bg-2"]
+    assert gate.stats()["admitted"] == 5
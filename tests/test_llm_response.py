@@ -0,0 +1,58 @@
+import asyncio
+
+from backend.core.llm_gate import LLMGate
+from backend.core.llm_response import LLMStreamingResponse
+
+
+class _Stream:
+    """Holds a gate slot like ChatStream does; close() gives it back."""
+
+    def __init__(self, gate):
+        self._slot = gate.acquire()
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+        self._slot.release()
+
+
+def _run(response, spec_version):
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": spec_version}}
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        # the client is already gone: the very first send fails
+        raise OSError("client disconnected")
+
+    async def call():
+        try:
+            await response(scope, receive, send)
+        except Exception:
+            pass
+
+    asyncio.run(call())
+
+
+def _body_never_started():
+    started = []
+
+    def body():
+        started.append(True)
+        yield "data: {}\n\n"
+
+    return body, started
+
+
+def test_slot_released_when_client_disconnects_before_first_chunk():
+    for spec_version in ("2.4", "2.3"):
+        gate = LLMGate(max_concurrency=1, max_queue=0, queue_timeout=0.1)
+        stream = _Stream(gate)
+        body, started = _body_never_started()
+        _run(LLMStreamingResponse(body(), stream, media_type="text/event-stream"), spec_version)
+        assert not started
+        assert stream.closed >= 1
+        assert gate.stats()["active"] == 0
+        # the slot can be taken again
+        gate.acquire().release()